@@ -1,49 +1,100 @@
-import time
+import random
+import threading
 import tkinter as tk
+from concurrent.futures import ThreadPoolExecutor
+from concurrent.futures.process import BrokenProcessPool
 from tkinter import ttk
-import random
 
+import endgame_table
+import parallel_search
+import solution_cache
 import with_graphs
 
-Tree = with_graphs.Graph()
-original_number = 0
-default_starter = "User"
-selected_number = 0
-selected_number_str = "0"
-actual_state = None
-choosen_algo = "Minimax"
+COMPUTER_MOVE_DELAY = 1000  # milliseconds before the computer starts its move
+SEARCH_POLL_INTERVAL = 50  # milliseconds between checks of the search worker
+ALGORITHMS = ["Minimax", "Alpha-Beta", "Iterative Deepening", "Parallel Alpha-Beta"]
+BOARD_CAPTIONS = ["💯Current Number: ", "👑User Points: ", "🤖Computer Points: ", "💰Bank Points: "]
 
+opening_table = endgame_table.load_table()
+# Starting numbers whose graph outgrew its budget, so their next games start in DEPTH_LIMITED mode
+depth_limited_numbers = set()
+# Kept across moves and games so positions searched before are not searched again. The
+# scores of the depth-limited searches are estimates, so each search mode has its own table
+transposition_tables = {mode: with_graphs.TranspositionTable() for mode in (with_graphs.FULL_GRAPH, with_graphs.DEPTH_LIMITED)}
+# Killer moves and history of the alpha-beta searches, kept across moves like the table
+move_ordering = with_graphs.MoveOrdering()
+# The computer moves are searched on this worker so the window stays responsive
+search_executor = ThreadPoolExecutor(max_workers=1)
+
+
+class GameSession:
+    """
+    All the mutable state of the window: the options chosen, the game being played and the
+    move of the computer in progress.
+    """
+    def __init__(self):
+        self.starter = "User"  # Who plays first, "User" or "Computer"
+        self.algorithm = ALGORITHMS[0]
+        self.time_limit = 1.0  # Time limit of the Iterative Deepening algorithm, in seconds
+        self.show_stats = False  # Collect and show the statistics of the computer's searches
+        # Solutions of the games played before, opened by the first Minimax move. Only the
+        # search worker uses it, as a sqlite connection belongs to the thread that opened it
+        self.solutions = None
+        # (starting number, solutions of every number reachable from it) of the last game the
+        # Minimax algorithm played, read from solutions or solved on the search worker
+        self.game_solutions = (None, None)
+        # Worker processes of the Parallel Alpha-Beta algorithm, started on its first move
+        self.parallel_searcher = None
+        self.search_future = None
+        self.search_cancel = None
+        self.pending_computer_move = None
+        self.reset()
+
+    def reset(self):
+        """Forgets the game being played."""
+        self.graph = with_graphs.LazyGraph()
+        # FULL_GRAPH, or DEPTH_LIMITED once the graph of the game outgrows its budget
+        self.search_mode = None
+        self.starting_number = ""  # The number chosen in the dropdown
+        self.selected_divider = 0
+        self.start_state = None
+        self.state = None
+
+    def is_user_turn(self):
+        """Check if the user can play a move."""
+        return self.state is not None and self.state.actual_player == 1 and not with_graphs.is_terminal(self.state)
+
+
+session = GameSession()
 
-# GUI for the game of divide me 
-root = tk.Tk()
-root.title("TEAM 4 AI")
 
 # Functions
 def start_game(num):
     """Starts the game with the provided number.
 
     Args:
-        num (int): The number to start the game with.
-    """
-    if num != '':
-        global Tree, actual_state
-        if default_starter == "User":
-            Tree = with_graphs.Graph()
-            startState = with_graphs.State(int(num), 0, 0, 0, 1)
-            Tree = with_graphs.generate_graph(startState, 1, Tree)
-            actual_state = startState
-            create_game_board(root)
-        else:
-            Tree = with_graphs.Graph()
-            startState = with_graphs.State(int(num), 0, 0, 0, 2)
-            Tree = with_graphs.generate_graph(startState, 1, Tree)
-            actual_state = startState
-            create_game_board(root)
-            time.sleep(1)
-            root.after(1000, move_computer)
-        
-    
-    
+        num (str): The number to start the game with, as chosen in the dropdown.
+    """
+    if num == "":
+        return
+    cancel_computer_move()
+    if session.starter == "User":
+        start_state = with_graphs.State(int(num), 0, 0, 0, 1)
+    else:
+        start_state = with_graphs.State(int(num), 0, 0, 0, 2)
+    # Only the states the computer needs are expanded, on the search worker
+    session.graph = with_graphs.LazyGraph(max_nodes=with_graphs.MAX_GRAPH_NODES, max_bytes=with_graphs.MAX_GRAPH_BYTES)
+    if start_state.actual_number in depth_limited_numbers:
+        session.search_mode = with_graphs.DEPTH_LIMITED
+    else:
+        session.search_mode = with_graphs.FULL_GRAPH
+    session.start_state = start_state
+    session.state = start_state
+    mode_var.set("🔎Search: " + session.search_mode)
+    update_game_board()
+    if session.starter != "User":
+        session.pending_computer_move = root.after(COMPUTER_MOVE_DELAY, move_computer)
+
 
 def make_move(divider):
     """Makes a move by dividing the selected number with the provided divider.
@@ -51,70 +102,298 @@ def make_move(divider):
     Args:
         divider (int): The divider to divide the selected number with.
     """
-    global actual_state, selected_number
-    if actual_state.actual_number % divider == 0:
-        selected_number = int(divider)
-        actual_state = Tree.get_from_divisor(actual_state, int(divider))
-        create_game_board(root)
-        time.sleep(1)
-        if len(Tree.get_children(actual_state)) == 0:
+    if not session.is_user_turn():
+        return
+    if session.state.actual_number % divider == 0:
+        session.state = with_graphs.apply_action(session.state, int(divider))
+        # The states the user did not play can no longer be reached
+        session.graph.reroot(session.state)
+        update_game_board()
+        if with_graphs.is_terminal(session.state):
             end_game()
         else:
-            root.after(1000, move_computer)
-        
+            session.pending_computer_move = root.after(COMPUTER_MOVE_DELAY, move_computer)
+
+
+def find_computer_move(graph, state, algorithm, limit, cancel, stats=None, start_number=None, searcher=None, mode=with_graphs.FULL_GRAPH):
+    """Finds the move of the computer. Runs on the search worker.
 
+    When the graph of the game outgrows its budget during a full-depth search, the move is
+    searched again in DEPTH_LIMITED mode, as in with_graphs.bounded_search.
+
+    Args:
+        graph (LazyGraph): The graph of the game.
+        state (State): The state the computer plays from.
+        algorithm (str): The algorithm chosen in the dropdown.
+        limit (float): The time limit of the Iterative Deepening algorithm, in seconds.
+        cancel (threading.Event): Set when the game is abandoned.
+        stats (SearchStats): Collects the statistics of the search, if given.
+        start_number (int): The starting number of the game, whose solutions the Minimax algorithm reads from the solution cache.
+        searcher (ParallelSearcher): The worker processes of the Parallel Alpha-Beta algorithm.
+        mode (str): The search mode of the game. With DEPTH_LIMITED, the searches stop
+            FALLBACK_DEPTH moves ahead and estimate the score with heuristic_evaluation.
+
+    Returns:
+        tuple: (divider played by the computer, search mode of the game from now on).
+    """
+    if algorithm == "Minimax":
+        return find_minimax_move(state, stats, start_number), mode
+    maximizing_player = state.actual_player == 1
+    if algorithm == "Parallel Alpha-Beta":
+        # The workers expand their own states, within the budget of the searcher
+        if stats is None:
+            return find_parallel_move(searcher, state, maximizing_player, mode, cancel)
+        # The nodes are counted in the worker processes, only the time is known here
+        with stats.phase("search"):
+            return find_parallel_move(searcher, state, maximizing_player, mode, cancel)
+    time_limit = limit if algorithm == "Iterative Deepening" else None
+    # The states expanded by the search are timed in the "build" phase
+    graph.stats = stats
+    try:
+        result, mode = with_graphs.bounded_search(graph, state, maximizing_player, mode, time_limit, transposition_tables,
+                                                  cancel=cancel, stats=stats, ordering=move_ordering)
+    finally:
+        graph.stats = None
+    return result.divisor, mode
+
+def find_minimax_move(state, stats=None, start_number=None):
+    """Finds the optimal move, with the arguments of find_computer_move.
+
+    Returns:
+        int: The divider played by the computer.
+    """
+    # The optimal move is a lookup, in the precomputed table, in the solutions of the game or
+    # in the memo of solve_position, which only depends on the number and is shared by every game
+    if stats is None:
+        entry = lookup_solution(state, start_number)
+    else:
+        # Includes solving the game on its first Minimax move, when it is not in the solution cache
+        with stats.phase("lookup"):
+            entry = lookup_solution(state, start_number)
+    if entry is not None:
+        return entry[1]
+    if stats is None:
+        return with_graphs.solve_position(state.actual_number, state.actual_player)[1]
+    with stats.phase("solve"):
+        return with_graphs.solve_position(state.actual_number, state.actual_player)[1]
+
+def lookup_solution(state, start_number=None):
+    """Returns the solution of a state from the precomputed table or the solutions of the game.
+
+    Args:
+        state (State): The state the computer plays from.
+        start_number (int): The starting number of the game, if its solutions can be used.
+
+    Returns:
+        tuple or None: (score, divider), or None if neither has the number of the state.
+    """
+    entry = opening_table.lookup(state.actual_number) if opening_table is not None else None
+    if entry is None and start_number is not None:
+        entry = load_game_solutions(start_number).get(state.actual_number)
+    return entry
+
+def load_game_solutions(start_number):
+    """Returns the solutions of a game, opening the solution cache on first use. Runs on the search worker.
+
+    A starting number played before is read back instead of being solved again.
+
+    Args:
+        start_number (int): The starting number of the game.
+
+    Returns:
+        dict: The solutions as returned by endgame_table.solve_numbers.
+    """
+    number, solutions = session.game_solutions
+    if number != start_number:
+        if session.solutions is None:
+            session.solutions = solution_cache.SolutionCache()
+        solutions = session.solutions.get_or_solve(start_number)
+        session.game_solutions = (start_number, solutions)
+    return solutions
+
+def find_parallel_move(searcher, state, maximizing_player, mode, cancel):
+    """Finds the move of the Parallel Alpha-Beta algorithm, with the arguments of find_computer_move.
+
+    Returns:
+        tuple: (divider played by the computer, search mode of the game from now on).
+    """
+    if mode == with_graphs.FULL_GRAPH:
+        try:
+            return searcher.search(state, with_graphs.depth_bound(state), maximizing_player, cancel=cancel).divisor, mode
+        except with_graphs.GraphBudgetExceeded:
+            mode = with_graphs.DEPTH_LIMITED
+    depth = min(with_graphs.depth_bound(state), with_graphs.FALLBACK_DEPTH)
+    return searcher.search(state, depth, maximizing_player, evaluate=with_graphs.heuristic_evaluation, cancel=cancel).divisor, mode
 
 def move_computer():
-    """Makes a move for the computer."""
-    global actual_state, choosen_algo
-    if choosen_algo == "Minimax":
-        old_state = actual_state
-        actual_state = with_graphs.get_path(Tree, actual_state, with_graphs.minimax(Tree, actual_state, with_graphs.get_depth(Tree, actual_state), 1))[0]
+    """Starts the move of the computer on the search worker."""
+    session.pending_computer_move = None
+    if session.algorithm == "Parallel Alpha-Beta" and session.parallel_searcher is None:
+        session.parallel_searcher = parallel_search.ParallelSearcher(max_nodes=with_graphs.MAX_GRAPH_NODES, max_bytes=with_graphs.MAX_GRAPH_BYTES)
+    session.search_cancel = threading.Event()
+    stats = with_graphs.SearchStats() if session.show_stats else None
+    session.search_future = search_executor.submit(
+        find_computer_move, session.graph, session.state, session.algorithm, session.time_limit,
+        session.search_cancel, stats, session.start_state.actual_number, session.parallel_searcher, session.search_mode)
+    thinking_var.set("🤔Thinking…")
+    root.after(SEARCH_POLL_INTERVAL, check_computer_move, session.search_future, stats)
+
+def check_computer_move(future, stats=None):
+    """Plays the move of the computer once the search worker has found it.
+
+    Args:
+        future (Future): The search started by move_computer.
+        stats (SearchStats): The statistics collected by the search, if any.
+    """
+    if future is not session.search_future:
+        # The search was cancelled by a new game
+        return
+    if not future.done():
+        root.after(SEARCH_POLL_INTERVAL, check_computer_move, future, stats)
+        return
+    session.search_future = None
+    thinking_var.set("")
+    if stats is not None:
+        stats_var.set(format_stats(stats))
+    try:
+        divider, mode = future.result()
+    except Exception as error:
+        # The game goes on with a move that needs no search, and the user is told why
+        if isinstance(error, BrokenProcessPool):
+            # A new pool of workers is started on the next Parallel Alpha-Beta move
+            session.parallel_searcher.shutdown(wait=False)
+            session.parallel_searcher = None
+        divider = fallback_move(session.state)
+        note = "The search failed ({}: {}), so the computer played its best immediate move.".format(type(error).__name__, error)
+        play_computer_move(divider, note)
+        return
+    if mode != session.search_mode:
+        session.search_mode = mode
+        depth_limited_numbers.add(session.start_state.actual_number)
+        mode_var.set("🔎Search: " + mode)
+    play_computer_move(divider)
+
+def fallback_move(state):
+    """Chooses a move without searching, for when the search of the computer fails.
+
+    Args:
+        state (State): The state the computer plays from.
+
+    Returns:
+        int: The divider whose child has the best heuristic_evaluation for the player to move.
+    """
+    choose = max if state.actual_player == 1 else min
+    return choose(with_graphs.possible_actions(state), key=lambda divider: with_graphs.heuristic_evaluation(with_graphs.apply_action(state, divider)))
+
+def format_stats(stats):
+    """Formats the statistics of a search for the debug panel.
+
+    Args:
+        stats (SearchStats): The statistics collected by the search.
+
+    Returns:
+        str: One line per statistic.
+    """
+    lines = [
+        "Nodes: {}  Leaves: {}  Table hits: {}".format(stats.nodes, stats.leaves, stats.table_hits),
+        "Cutoffs: {} beta, {} alpha ({:.0%} of nodes, {:.0%} on the first move)".format(
+            stats.beta_cutoffs, stats.alpha_cutoffs, stats.cutoff_rate(), stats.first_move_cutoff_rate()),
+        "Depth: {} (deepest ply {})  Branching factor: {:.2f}".format(stats.depth, stats.max_ply, stats.effective_branching_factor()),
+    ]
+    if stats.timings:
+        # The build time is spent inside the search and is part of it
+        lines.append("  ".join("{}: {:.3f} ms".format(name, seconds * 1000) for name, seconds in stats.timings.items()))
+    return "\n".join(lines)
+
+def play_computer_move(divider, note=None):
+    """Plays the move found for the computer.
+
+    Args:
+        divider (int): The divider played by the computer.
+        note (str): A line shown before the move, if any.
+    """
+    session.state = with_graphs.apply_action(session.state, divider)
+    session.graph.reroot(session.state)
+    update_game_board()
+    if with_graphs.is_terminal(session.state):
+        end_game(divider, note)
     else:
-        old_state = actual_state
-        actual_state = with_graphs.get_path(Tree, actual_state, with_graphs.alpha_beta(Tree, actual_state, with_graphs.get_depth(Tree, actual_state), float("-inf"), float("inf"), True))[0]
-    create_game_board(root)
-    display_computer_move(old_state.actual_number / actual_state.actual_number)
-    if len(Tree.get_children(actual_state)) == 0:
-        end_game()
+        display_computer_move(divider, note)
+
+def cancel_computer_move():
+    """Stops the move of the computer, whether it is scheduled or being searched."""
+    if session.pending_computer_move is not None:
+        root.after_cancel(session.pending_computer_move)
+        session.pending_computer_move = None
+    if session.search_future is not None:
+        session.search_cancel.set()
+        session.search_future.cancel()
+        session.search_future = None
+    thinking_var.set("")
+
+def show_message(title, text):
+    """Shows a message in the message window, which is created once and hidden when closed.
 
-def display_computer_move(divider):
+    Args:
+        title (str): The title of the window.
+        text (str): The message.
+    """
+    global message_window
+    if message_window is None:
+        message_window = tk.Toplevel(root)
+        message_window.protocol("WM_DELETE_WINDOW", message_window.withdraw)
+        message_label = ttk.Label(message_window, textvariable=message_var, font=("Comic Sans MS", 12))
+        message_label.pack(padx=10, pady=10)
+    message_window.title(title)
+    message_var.set(text)
+    message_window.deiconify()
+    message_window.lift()
+
+def display_computer_move(divider, note=None):
     """Displays the move made by the computer.
 
     Args:
-        divider (float): The divider used by the computer.
+        divider (int): The divider used by the computer.
+        note (str): A line shown before the move, if any.
     """
-    computer_move_window = tk.Toplevel(root)
-    computer_move_window.title("Computer Move")
-    computer_move_label = ttk.Label(computer_move_window, text="The computer played " + str(int(divider)), font=("Comic Sans MS", 12))
-    computer_move_label.pack(padx=10, pady=10)
+    text = "The computer played " + str(int(divider))
+    if note is not None:
+        text = note + "\n" + text
+    show_message("Computer Move", text)
 
 
-def end_game():
-    """Displays the result of the game."""
-    computer_move_window = tk.Toplevel(root)
-    computer_move_window.title("Game over")
-    if actual_state.points_player1 > actual_state.points_player2:
+def end_game(divider=None, note=None):
+    """Displays the result of the game.
+
+    Args:
+        divider (int): The last move, if the computer played it.
+        note (str): A line shown before the result, if any.
+    """
+    if session.state.points_player1 > session.state.points_player2:
         text = "You won!"
-    elif actual_state.points_player1 == actual_state.points_player2:
+    elif session.state.points_player1 == session.state.points_player2:
         text = "It is a tie!"
     else:
         text = "You lost!"
-    computer_move_label = ttk.Label(computer_move_window, text=text, font=("Comic Sans MS", 12))
-    computer_move_label.pack(padx=10, pady=10)
+    if divider is not None:
+        text = "The computer played " + str(int(divider)) + "\n" + text
+    if note is not None:
+        text = note + "\n" + text
+    show_message("Game over", text)
 
 def start_new_game():
     """Starts a new game."""
-    global Tree, original_number, default_starter, selected_number, actual_state, choosen_algo
-    Tree = with_graphs.Graph()
-    original_number = 0
-    default_starter = "User"
-    selected_number = 0
-    selected_number_str = "0"
-    actual_state = None
-    choosen_algo = "Minimax"
-    create_divider_selection(root)
-    create_game_board(root)
+    cancel_computer_move()
+    session.reset()
+    session.starter = "User"
+    for table in transposition_tables.values():
+        table.reset_if_rules_changed(with_graphs.rules_fingerprint())
+    who_starts_var.set(session.starter)
+    mode_var.set("")
+    numbers_var.set("")
+    divider_var.set("")
+    numbers_dropdown.configure(values=generate_numbers())
+    update_game_board()
 
 def generate_numbers():
     """
@@ -132,12 +411,12 @@ def generate_numbers():
 
 def create_gui(root):
     """
-    Creates the GUI for the Divide Me! game.
+    Creates the GUI for the Divide Me! game. Every widget is created here, once, and then
+    updated through its variable.
     """
-    global original_number
     # Setting the window's position
     set_window_centered(root)
-    # Disabling the maximization of the page 
+    # Disabling the maximization of the page
     root.resizable(False, False)
     # Set lime green as background color
     root.configure(background='lime green')
@@ -145,25 +424,45 @@ def create_gui(root):
     create_title(root)
     create_options_section(root)
     create_game_board(root)
+    create_thinking_indicator(root)
     create_divider_selection(root)
+    create_stats_panel(root)
     # Creating custom styles for the desired font for the buttons like user, computer, make move, start game etc.
     custom_style = ttk.Style()
     custom_style.configure("Custom.TButton", font=("Comic Sans MS", 12))
-    custom_style.configure("Custom.TRadiobutton", font=("Comic Sans MS", 10)) 
+    custom_style.configure("Custom.TRadiobutton", font=("Comic Sans MS", 10))
+    root.protocol("WM_DELETE_WINDOW", close_gui)
     root.mainloop()
 
+def close_gui():
+    """
+    Stops the search worker and closes the window."""
+    cancel_computer_move()
+    # The solution cache is closed by the thread that opened it, after the search in progress
+    search_executor.submit(close_solutions)
+    search_executor.shutdown(wait=False)
+    if session.parallel_searcher is not None:
+        session.parallel_searcher.shutdown(wait=False)
+    root.destroy()
+
+def close_solutions():
+    """Closes the solution cache, if a Minimax move opened it. Runs on the search worker."""
+    if session.solutions is not None:
+        session.solutions.close()
+        session.solutions = None
+
 def set_window_centered(root):
     """
     Sets the window to the center of the screen."""
     screen_width = root.winfo_screenwidth()
     screen_height = root.winfo_screenheight()
-    
+
     # Setting the windows of the game to the center of the screen
     # In order to center the window it calculates x and y coordinates first
     x = (screen_width - root.winfo_reqwidth()) / 2
     y = (screen_height - root.winfo_reqheight()) / 2
     root.geometry("+{}+{}".format(int(x), int(y)))
-    
+
 def create_title(root):
     """
     Creates the title of the game."""
@@ -185,16 +484,12 @@ def create_who_starts_section(options_frame):
     """
     Creates the section for choosing who starts the game.
     """
-    global default_starter
-
     def update_default_starter():
-        global default_starter
-        default_starter = who_starts_var.get()
+        session.starter = who_starts_var.get()
 
     who_starts_label = ttk.Label(options_frame, text="⭐Choose who starts the game:", foreground="dark blue", font=("Comic Sans MS", 12))
     who_starts_label.grid(row=0, column=0, padx=5, pady=5, sticky="w")
-    who_starts_var = tk.StringVar(root)
-    who_starts_var.set("User")  # User is default selection
+    who_starts_var.set(session.starter)
 
     user_radio = ttk.Radiobutton(options_frame, text="👤User", variable=who_starts_var, value="User", style="Custom.TRadiobutton", command=update_default_starter)
     user_radio.grid(row=0, column=1, padx=5, pady=5)
@@ -202,9 +497,6 @@ def create_who_starts_section(options_frame):
     computer_radio = ttk.Radiobutton(options_frame, text="🤖Computer", variable=who_starts_var, value="Computer", style="Custom.TRadiobutton", command=update_default_starter)
     computer_radio.grid(row=0, column=2, padx=5, pady=5)
 
-    # Update the variable default_starter with the initial value
-    default_starter = who_starts_var.get()
-
 def create_algorithm_selection_section(options_frame):
     """
     Creates the section for choosing the algorithm.
@@ -212,18 +504,48 @@ def create_algorithm_selection_section(options_frame):
     algorithm_label = ttk.Label(options_frame, text="🃏Choose an algorithm: ", foreground="dark blue", font=("Comic Sans MS", 12))
     algorithm_label.grid(row=1, column=0, padx=5, pady=5, sticky="w")
 
-    algorithm_options = ["Minimax", "Alpha-Beta"]
-    algo_var = tk.StringVar(root)
-    algo_var.set(algorithm_options[0])
-    algorithm_dropdown = ttk.Combobox(options_frame, textvariable=algo_var, values=algorithm_options, state="readonly")
+    algo_var = tk.StringVar(root, value=session.algorithm)
+    algorithm_dropdown = ttk.Combobox(options_frame, textvariable=algo_var, values=ALGORITHMS, state="readonly")
     algorithm_dropdown.grid(row=1, column=1, columnspan=2, padx=5, pady=5, sticky="ew")
-    choosen_algo = algo_var.get()
+
+    def update_choosen_algo():
+        session.algorithm = algo_var.get()
+
+    algorithm_dropdown.bind("<<ComboboxSelected>>", lambda event: update_choosen_algo())
+
+    time_limit_label = ttk.Label(options_frame, text="⏱Time limit per move (s): ", foreground="dark blue", font=("Comic Sans MS", 12))
+    time_limit_label.grid(row=2, column=0, padx=5, pady=5, sticky="w")
+
+    time_limit_var = tk.StringVar(root, value=str(session.time_limit))
+    time_limit_spinbox = ttk.Spinbox(options_frame, textvariable=time_limit_var, from_=0.1, to=60.0, increment=0.5, width=6)
+    time_limit_spinbox.grid(row=2, column=1, columnspan=2, padx=5, pady=5, sticky="w")
+
+    def update_time_limit(*args):
+        """Used by the Iterative Deepening algorithm, invalid values are ignored."""
+        try:
+            value = float(time_limit_var.get())
+        except ValueError:
+            return
+        if value > 0:
+            session.time_limit = value
+
+    time_limit_var.trace_add("write", update_time_limit)
+
+    show_stats_var = tk.BooleanVar(root, value=session.show_stats)
+
+    def update_show_stats():
+        session.show_stats = show_stats_var.get()
+        if not session.show_stats:
+            stats_var.set("")
+
+    show_stats_check = ttk.Checkbutton(options_frame, text="Show search statistics", variable=show_stats_var, command=update_show_stats)
+    show_stats_check.grid(row=3, column=0, columnspan=3, padx=5, pady=5, sticky="w")
 
 def create_start_button(root):
     """
     Creates the start button for the game.
     """
-    start_button = ttk.Button(root, text="Start Game", image=start_icon, compound=tk.LEFT, command=lambda: start_game(original_number) if original_number != "0" else None, style="Custom.TButton", width=15)
+    start_button = ttk.Button(root, text="Start Game", image=start_icon, compound=tk.LEFT, command=lambda: start_game(session.starting_number), style="Custom.TButton", width=15)
     start_button.grid(row=2, column=0, pady=10, padx=(260, 180), sticky="w")
 
 def create_game_board(root):
@@ -232,47 +554,51 @@ def create_game_board(root):
     """
     game_board_frame = ttk.Frame(root)
     game_board_frame.grid(row=3, column=0, pady=10, padx=(245, 180), sticky="w")
-  
-    create_game_board_labels(game_board_frame)
 
-def create_game_board_labels(game_board_frame):
+    for row, variable in enumerate(board_vars):
+        label = ttk.Label(game_board_frame, textvariable=variable, foreground="dark blue", font=("Comic Sans MS", 12), width=21)
+        label.grid(row=row, column=0, padx=5, pady=5, sticky="w")
+    update_game_board()
+
+def update_game_board():
     """
-    Creates the labels for the game board.
+    Shows the current state of the game on the board.
     """
-    if actual_state is not None:
-        labels_info = [
-        ("💯Current Number: " + str(actual_state.actual_number), 0),
-        ("👑User Points: " + str(actual_state.points_player1), 1),
-        ("🤖Computer Points: " + str(actual_state.points_player2), 2),
-        ("💰Bank Points: " + str(actual_state.bank), 3)
-        ]
-    else:
-        labels_info = [
-        ("💯Current Number: ", 0),
-        ("👑User Points: ", 1),
-        ("🤖Computer Points: ", 2),
-        ("💰Bank Points: ", 3)
-        ]
-    for label_text, row in labels_info:
-        label = ttk.Label(game_board_frame, text=label_text, foreground="dark blue", font=("Comic Sans MS", 12), width=21)
-        label.grid(row=row, column=0, padx=5, pady=5, sticky="w")
-   
+    state = session.state
+    values = ["", "", "", ""] if state is None else [state.actual_number, state.points_player1, state.points_player2, state.bank]
+    for variable, caption, value in zip(board_vars, BOARD_CAPTIONS, values):
+        variable.set(caption + str(value))
+
+def create_thinking_indicator(root):
+    """
+    Creates the label shown while the computer searches its move, and the label of the search mode of the game.
+    """
+    thinking_label = ttk.Label(root, textvariable=thinking_var, foreground="dark blue", font=("Comic Sans MS", 12))
+    thinking_label.grid(row=3, column=0, padx=(0, 60), sticky="e")
+
+    mode_label = ttk.Label(root, textvariable=mode_var, foreground="dark blue", font=("Comic Sans MS", 10))
+    mode_label.grid(row=2, column=0, padx=(0, 60), sticky="e")
+
+def create_stats_panel(root):
+    """
+    Creates the debug panel showing the statistics of the last search of the computer.
+    """
+    stats_label = ttk.Label(root, textvariable=stats_var, foreground="dark blue", font=("Courier", 9), justify=tk.LEFT)
+    stats_label.grid(row=12, column=0, padx=60, pady=5, sticky="w")
+
 def create_divider_selection(root):
     """
     Creates the divider selection section of the game.
     """
-    global original_number, selected_number, selected_number_str
+    global numbers_dropdown
     numbers_label = ttk.Label(root, text="🧩Select a number among generated numbers to start the game with🎯", foreground="dark blue", font=("Comic Sans MS", 12))
     numbers_label.grid(row=4, column=0, padx=60, pady=5, sticky="ew")
 
-    divisible_numbers = generate_numbers()
-    numbers_var = tk.StringVar(root)
-    numbers_dropdown = ttk.Combobox(root, textvariable=numbers_var, values=divisible_numbers, state="readonly")
+    numbers_dropdown = ttk.Combobox(root, textvariable=numbers_var, values=generate_numbers(), state="readonly")
     numbers_dropdown.grid(row=5, column=0, padx=200, pady=5, sticky="ew")
 
     def update_original_number():
-        global original_number
-        original_number = numbers_var.get()
+        session.starting_number = numbers_var.get()
 
     numbers_dropdown.bind("<<ComboboxSelected>>", lambda event: update_original_number())
 
@@ -280,39 +606,49 @@ def create_divider_selection(root):
     divider_label = ttk.Label(root, text="🎰Select a divider:", foreground="dark blue", font=("Comic Sans MS", 12))
     divider_label.grid(row=8, column=0, padx=255, pady=5, sticky="w")
 
-    divider_var = tk.StringVar(root)
-    divider_dropdown = ttk.Combobox(root, textvariable=divider_var, values=[2, 3, 4], state="readonly")
+    divider_dropdown = ttk.Combobox(root, textvariable=divider_var, values=list(with_graphs.DIVISORS), state="readonly")
     divider_dropdown.grid(row=9, column=0, padx=255, pady=5, sticky="w")
 
     def update_selected_number():
-        global selected_number
         selected_number_str = divider_var.get()
         if selected_number_str != "":
-            selected_number = int(selected_number_str)
+            session.selected_divider = int(selected_number_str)
 
     divider_dropdown.bind("<<ComboboxSelected>>", lambda event: update_selected_number())
 
-    current_number_var = tk.StringVar(root)
-    current_number_var.set("")  # Initially empty
-    current_number_display = ttk.Label(root, textvariable=current_number_var, foreground="dark blue", font=("Comic Sans MS", 12))
-    current_number_display.grid(row=11, column=1, padx=5, pady=5, sticky="w")
-
     create_move_and_new_game_buttons(root)
 
 def create_move_and_new_game_buttons(root):
     """
     Creates the move and new game buttons.
     """
-    move_button = ttk.Button(root, text="Make Move", image=move_icon, compound=tk.LEFT, command=lambda: make_move(selected_number) if selected_number != 0 else None, style="Custom.TButton")
+    move_button = ttk.Button(root, text="Make Move", image=move_icon, compound=tk.LEFT, command=lambda: make_move(session.selected_divider) if session.selected_divider != 0 else None, style="Custom.TButton")
     move_button.grid(row=10, column=0, pady=10, padx=(270, 180), sticky="w")
 
     new_game_button = ttk.Button(root, text="Start New Game", image=new_game_icon, compound=tk.LEFT, command=start_new_game, style="Custom.TButton")
     new_game_button.grid(row=11, column=0, pady=10, padx=(260, 180),  sticky="w")
 
-title_icon = tk.PhotoImage(file="static.png")
-move_icon = tk.PhotoImage(file="algorithm.png")
-start_icon=tk.PhotoImage(file="start.png")
-new_game_icon =tk.PhotoImage(file="rocket.png")
+# The worker processes of the parallel search may import this module, they must not open a window
+if __name__ == "__main__":
+    # GUI for the game of divide me
+    root = tk.Tk()
+    root.title("TEAM 4 AI")
+    # Variables of the widgets, the widgets are only created once and show whatever these hold
+    thinking_var = tk.StringVar(root)
+    mode_var = tk.StringVar(root)
+    stats_var = tk.StringVar(root)
+    message_var = tk.StringVar(root)
+    who_starts_var = tk.StringVar(root)
+    numbers_var = tk.StringVar(root)
+    divider_var = tk.StringVar(root)
+    board_vars = [tk.StringVar(root) for _ in BOARD_CAPTIONS]
+    # Created by show_message and create_divider_selection
+    message_window = None
+    numbers_dropdown = None
 
+    title_icon = tk.PhotoImage(file="static.png")
+    move_icon = tk.PhotoImage(file="algorithm.png")
+    start_icon=tk.PhotoImage(file="start.png")
+    new_game_icon =tk.PhotoImage(file="rocket.png")
 
-create_gui(root)
+    create_gui(root)
@@ -0,0 +1,204 @@
+'''Benchmarks of graph building and search over fixed, seeded sets of starting numbers.
+
+Example:
+
+	python benchmark.py --output baseline.json
+	python benchmark.py --compare baseline.json
+
+For every set of starting numbers and every phase (build_graph, solve_graph, get_depth,
+minimax, alpha_beta, alpha_beta with MoveOrdering, get_path, CSRGraph.from_graph), the wall time, the peak memory, the node and edge counts
+and the number of nodes searched are written to a JSON file. With --compare, phases that
+got slower, use more memory or search more nodes than the baseline are reported as
+regressions and the exit status is 1. A phase only counts as slower when its time grew by
+more than --min-seconds as well, since phases of a few milliseconds vary by more than the
+threshold from run to run.
+'''
+import argparse
+import json
+import platform
+import random
+import sys
+import time
+import tracemalloc
+
+import with_graphs
+
+# Each set is drawn from its own seeded random generator, so the numbers never change
+NUMBER_SETS = {
+	"small": {"count": 50, "search_depth": None},
+	"typical": {"count": 50, "search_depth": None},
+	"large": {"count": 10, "search_depth": 12},
+}
+# Smallest increase of the time of a phase, summed over its set, reported as a regression
+MIN_SECONDS_DELTA = 0.005
+PHASES = ["build", "solve", "depth", "minimax", "alpha_beta", "alpha_beta_ordered", "path", "csr"]
+
+def benchmark_numbers(name, seed=0):
+	'''Get the starting numbers of a benchmark set.
+
+	Args:
+		name (str): "small", "typical" or "large".
+		seed (int): The seed of the set.
+
+	Returns:
+		list: The starting numbers.
+	'''
+	rng = random.Random(f"{name}-{seed}")
+	count = NUMBER_SETS[name]["count"]
+	if name == "small":
+		return [rng.randrange(12, 2000, 12) for _ in range(count)]
+	if name == "typical":
+		# The range used by random_begin
+		return [rng.randrange(20004, 30000, 12) for _ in range(count)]
+	# Numbers with many factors of 2 and 3, so the games are long
+	return [2 ** rng.randint(8, 11) * 3 ** rng.randint(4, 7) * rng.choice([1, 5, 7, 11]) for _ in range(count)]
+
+def _measure(function, repeat):
+	# Best wall time over repeat runs, then the peak memory of one more run
+	seconds = None
+	for _ in range(repeat):
+		start = time.perf_counter()
+		result = function()
+		elapsed = time.perf_counter() - start
+		seconds = elapsed if seconds is None else min(seconds, elapsed)
+	tracemalloc.start()
+	try:
+		function()
+		peak = tracemalloc.get_traced_memory()[1]
+	finally:
+		tracemalloc.stop()
+	return result, seconds, peak
+
+def benchmark_number(number, search_depth=None, repeat=3):
+	'''Benchmark every phase for one starting number.
+
+	Args:
+		number (int): The starting number. Player 1 moves first.
+		search_depth (int): The depth of the minimax and alpha_beta searches. By default, the depth of the graph.
+		repeat (int): The number of timed runs of each phase. The best time is kept.
+
+	Returns:
+		dict: For each phase, the seconds, peak bytes, nodes, edges and nodes searched.
+	'''
+	state = with_graphs.State(number, 0, 0, 0, 1)
+	results = {}
+
+	(graph, nodes, edges), seconds, peak = _measure(lambda: with_graphs.build_graph(state), repeat)
+	results["build"] = {"seconds": seconds, "peak_bytes": peak, "nodes": nodes, "edges": edges, "nodes_searched": 0}
+
+	_, seconds, peak = _measure(lambda: with_graphs.solve_graph(graph), repeat)
+	results["solve"] = {"seconds": seconds, "peak_bytes": peak, "nodes": nodes, "edges": edges, "nodes_searched": nodes}
+
+	def depth_phase():
+		graph.depths.clear()
+		return with_graphs.get_depth(graph, state)
+	depth, seconds, peak = _measure(depth_phase, repeat)
+	results["depth"] = {"seconds": seconds, "peak_bytes": peak, "nodes": nodes, "edges": edges, "nodes_searched": nodes}
+
+	if search_depth is None:
+		search_depth = depth
+	searches = (
+		("minimax", lambda stats: with_graphs.minimax_search(graph, state, search_depth, True, stats=stats)),
+		("alpha_beta", lambda stats: with_graphs.alpha_beta_search(graph, state, search_depth, True, stats=stats)),
+		# A fresh ordering each run, so the killers and history of a run do not help the next
+		("alpha_beta_ordered", lambda stats: with_graphs.alpha_beta_search(graph, state, search_depth, True, stats=stats, ordering=with_graphs.MoveOrdering())),
+	)
+	for phase, search in searches:
+		stats = None
+		def search_phase():
+			nonlocal stats
+			stats = with_graphs.SearchStats()
+			return search(stats)
+		result, seconds, peak = _measure(search_phase, repeat)
+		results[phase] = {"seconds": seconds, "peak_bytes": peak, "nodes": nodes, "edges": edges, "nodes_searched": stats.nodes}
+
+	leaf = result.pv[-1][0] if result.pv else state
+	path, seconds, peak = _measure(lambda: with_graphs.get_path(graph, state, leaf), repeat)
+	results["path"] = {"seconds": seconds, "peak_bytes": peak, "nodes": nodes, "edges": edges, "nodes_searched": len(path)}
+
+	_, seconds, peak = _measure(lambda: with_graphs.CSRGraph.from_graph(graph), repeat)
+	results["csr"] = {"seconds": seconds, "peak_bytes": peak, "nodes": nodes, "edges": edges, "nodes_searched": nodes}
+	return results
+
+def run_benchmarks(seed=0, repeat=3, sets=None):
+	'''Benchmark every phase over the benchmark sets.
+
+	Args:
+		seed (int): The seed of the sets.
+		repeat (int): The number of timed runs of each phase.
+		sets (list): The names of the sets to run. By default, all of them.
+
+	Returns:
+		dict: The environment and, for each set and phase, the totals over the set
+			  (the peak bytes are the largest peak of the set).
+	'''
+	report = {
+		"meta": {"python": platform.python_version(), "platform": platform.platform(), "seed": seed, "repeat": repeat},
+		"results": {},
+	}
+	for name in sets or NUMBER_SETS:
+		totals = {phase: {"seconds": 0.0, "peak_bytes": 0, "nodes": 0, "edges": 0, "nodes_searched": 0} for phase in PHASES}
+		for number in benchmark_numbers(name, seed):
+			for phase, measures in benchmark_number(number, NUMBER_SETS[name]["search_depth"], repeat).items():
+				total = totals[phase]
+				total["seconds"] += measures["seconds"]
+				total["peak_bytes"] = max(total["peak_bytes"], measures["peak_bytes"])
+				for key in ("nodes", "edges", "nodes_searched"):
+					total[key] += measures[key]
+		report["results"][name] = totals
+	return report
+
+def compare(report, baseline, threshold=0.2, min_seconds=MIN_SECONDS_DELTA):
+	'''Find the phases that regressed against a baseline.
+
+	Args:
+		report (dict): The report of run_benchmarks.
+		baseline (dict): An older report.
+		threshold (float): The relative increase above which a measure is a regression.
+		min_seconds (float): The absolute increase of the time of a phase below which it is not a regression.
+
+	Returns:
+		list: One message per regression.
+	'''
+	regressions = []
+	for name, phases in report["results"].items():
+		for phase, measures in phases.items():
+			old = baseline.get("results", {}).get(name, {}).get(phase)
+			if old is None:
+				continue
+			for key in ("seconds", "peak_bytes", "nodes_searched"):
+				if key == "seconds" and measures[key] - old[key] <= min_seconds:
+					continue
+				if old[key] and measures[key] > old[key] * (1 + threshold):
+					regressions.append(f"{name}/{phase}: {key} {old[key]:.6g} -> {measures[key]:.6g} (+{measures[key] / old[key] - 1:.0%})")
+	return regressions
+
+def main():
+	parser = argparse.ArgumentParser(description="Benchmark graph building and search over fixed sets of starting numbers.")
+	parser.add_argument("--output", default="benchmark.json", help="file the results are written to")
+	parser.add_argument("--compare", metavar="BASELINE", help="report regressions against this results file")
+	parser.add_argument("--threshold", type=float, default=0.2, help="relative increase reported as a regression")
+	parser.add_argument("--min-seconds", type=float, default=MIN_SECONDS_DELTA, help="smallest increase of the time of a phase reported as a regression")
+	parser.add_argument("--seed", type=int, default=0, help="seed of the sets of starting numbers")
+	parser.add_argument("--repeat", type=int, default=3, help="timed runs of each phase, the best one is kept")
+	parser.add_argument("--sets", nargs="+", choices=list(NUMBER_SETS), help="sets to run, all of them by default")
+	args = parser.parse_args()
+
+	report = run_benchmarks(args.seed, args.repeat, args.sets)
+	with open(args.output, "w") as f:
+		json.dump(report, f, indent=2)
+	for name, phases in report["results"].items():
+		for phase, measures in phases.items():
+			print(f"{name:8} {phase:18} {measures['seconds'] * 1000:10.2f} ms {measures['peak_bytes'] / 1024:10.1f} KiB {measures['nodes_searched']:10} searched")
+
+	if args.compare:
+		with open(args.compare) as f:
+			baseline = json.load(f)
+		regressions = compare(report, baseline, args.threshold, args.min_seconds)
+		for regression in regressions:
+			print("REGRESSION", regression)
+		if regressions:
+			sys.exit(1)
+
+if __name__ == "__main__":
+	main()
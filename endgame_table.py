@@ -0,0 +1,204 @@
+'''Precomputed table of optimal moves for the starting numbers of the game.
+
+The remaining course of a game only depends on the current number: the points and the
+bank never change which moves are possible, and both players score by the same rule. The
+table therefore stores, for every number reachable from the starting range, the best
+remaining score difference for the player to move and the divisor that achieves it.
+
+Build the table once with:
+
+	python endgame_table.py
+
+The GUI memory-maps the resulting file at startup and falls back to a live search for
+numbers that are not in it. The file records with_graphs.rules_fingerprint(), and a table
+built under other rules is ignored until it is built again.
+'''
+import argparse
+import mmap
+import os
+import struct
+
+import with_graphs
+
+DEFAULT_TABLE_PATH = os.path.join(os.path.dirname(os.path.abspath(__file__)), "endgame_table.bin")
+TABLE_MAGIC = b"DMT1"
+TABLE_VERSION = 2
+HEADER = struct.Struct("<4sH20sI")  # magic, version, fingerprint of the rules, number of records
+RECORD = struct.Struct("<QhB")  # number, value for the player to move, divisor (0 if the game is over)
+
+class StaleTableError(ValueError):
+	"""
+	Raised when a table file was written by another version or under other rules.
+	"""
+
+def starting_numbers(low=20000, high=30000, step=12):
+	'''Get every number between low and high that is divisible by step.
+
+	Args:
+		low (int): The lowest starting number.
+		high (int): The highest starting number.
+		step (int): The number every starting number is divisible by.
+
+	Returns:
+		list: The starting numbers, in increasing order.
+	'''
+	first = low + (-low) % step
+	return list(range(first, high + 1, step))
+
+def solve_numbers(numbers):
+	'''Solve every number reachable from the given starting numbers.
+
+	Args:
+		numbers (list): The starting numbers.
+
+	Returns:
+		dict: Maps each reachable number to a tuple (value, divisor), where value is the best
+			  remaining score difference for the player to move and divisor is the move that
+			  achieves it, or None if the game is over.
+	'''
+	reachable = set()
+	stack = list(numbers)
+	while stack:
+		number = stack.pop()
+		if number in reachable:
+			continue
+		reachable.add(number)
+		state = with_graphs.State(number, 0, 0, 0, 1)
+		if not with_graphs.is_terminal(state):
+			for divisor in with_graphs.possible_actions(state):
+				stack.append(with_graphs.apply_action(state, divisor).actual_number)
+
+	# In increasing order, the children of a number are in the memo before it is solved
+	return {number: with_graphs.solve_position(number) for number in sorted(reachable)}
+
+def write_table(path, solved):
+	'''Write solved numbers to a table file.
+
+	Args:
+		path (str): The path of the table file.
+		solved (dict): The solved numbers, as returned by solve_numbers.
+	'''
+	with open(path, "wb") as f:
+		f.write(HEADER.pack(TABLE_MAGIC, TABLE_VERSION, bytes.fromhex(with_graphs.rules_fingerprint()), len(solved)))
+		for number in sorted(solved):
+			value, divisor = solved[number]
+			f.write(RECORD.pack(number, value, divisor or 0))
+
+class EndgameTable:
+	'''
+	Read-only view of a table file, memory-mapped and searched by binary search.
+	'''
+	def __init__(self, path, rules=None):
+		"""
+		Args:
+			path (str): The path of the table file.
+			rules (str): The fingerprint of the rules. By default, with_graphs.rules_fingerprint().
+
+		Raises:
+			StaleTableError: If the table was written by another version or under other rules.
+			ValueError: If the file is not an endgame table or is truncated.
+		"""
+		if rules is None:
+			rules = with_graphs.rules_fingerprint()
+		with open(path, "rb") as f:
+			self._map = mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ)
+		if len(self._map) < 6 or self._map[:4] != TABLE_MAGIC:
+			self._map.close()
+			raise ValueError(f"{path} is not an endgame table.")
+		if struct.unpack_from("<H", self._map, 4)[0] != TABLE_VERSION:
+			self._map.close()
+			raise StaleTableError(f"{path} is not a version {TABLE_VERSION} endgame table.")
+		if len(self._map) < HEADER.size:
+			self._map.close()
+			raise ValueError(f"{path} is truncated.")
+		_, _, table_rules, count = HEADER.unpack_from(self._map, 0)
+		if table_rules.hex() != rules:
+			self._map.close()
+			raise StaleTableError(f"{path} was built under other rules.")
+		if len(self._map) != HEADER.size + count * RECORD.size:
+			self._map.close()
+			raise ValueError(f"{path} is truncated.")
+		self._count = count
+
+	def __len__(self):
+		return self._count
+
+	def lookup(self, number):
+		"""
+		Returns the solution stored for a number.
+
+		Args:
+			number (int): The number to look up.
+
+		Returns:
+			tuple or None: (value, divisor) as in solve_numbers, or None if the number is not in the table.
+		"""
+		low = 0
+		high = self._count
+		while low < high:
+			middle = (low + high) // 2
+			key, value, divisor = RECORD.unpack_from(self._map, HEADER.size + middle * RECORD.size)
+			if key < number:
+				low = middle + 1
+			elif key > number:
+				high = middle
+			else:
+				return value, divisor or None
+		return None
+
+	def covers(self, number):
+		"""
+		Check if a number is in the table. Every number reachable from it is then in the table too.
+		"""
+		return self.lookup(number) is not None
+
+	def get_value(self, state):
+		"""
+		Returns the final score (points_player1 - points_player2) reached from a state with optimal play.
+
+		Args:
+			state (State): The state to evaluate.
+
+		Returns:
+			int or None: The final score, or None if the number is not in the table.
+		"""
+		entry = self.lookup(state.actual_number)
+		if entry is None:
+			return None
+		if state.actual_player == 1:
+			return with_graphs.evaluate_state(state) + entry[0]
+		return with_graphs.evaluate_state(state) - entry[0]
+
+	def close(self):
+		self._map.close()
+
+def load_table(path=DEFAULT_TABLE_PATH):
+	'''Memory-map a table file if it exists and was built under the current rules.
+
+	Args:
+		path (str): The path of the table file.
+
+	Returns:
+		EndgameTable or None: The table, or None if the file does not exist or is stale.
+	'''
+	if not os.path.exists(path):
+		return None
+	try:
+		return EndgameTable(path)
+	except StaleTableError:
+		return None
+
+def main():
+	parser = argparse.ArgumentParser(description="Solve every game of a range of starting numbers and write the endgame table.")
+	parser.add_argument("--low", type=int, default=20000, help="lowest starting number")
+	parser.add_argument("--high", type=int, default=30000, help="highest starting number")
+	parser.add_argument("--step", type=int, default=12, help="every starting number is divisible by this number")
+	parser.add_argument("--output", default=DEFAULT_TABLE_PATH, help="path of the table file")
+	args = parser.parse_args()
+
+	solved = solve_numbers(starting_numbers(args.low, args.high, args.step))
+	write_table(args.output, solved)
+	print(f"Wrote {len(solved)} positions to {args.output}")
+
+if __name__ == "__main__":
+	main()
@@ -0,0 +1,221 @@
+'''Streaming export of game graphs to DOT, GraphML and newline-delimited JSON.
+
+Each writer walks the graph once and writes every node and edge to a file object as soon
+as it is reached, so the text of a large graph is never held in memory. Nodes are named
+with with_graphs.state_id, so two exports of the same graph can be compared line by line.
+
+A node whose children are left out, below the depth limit or never expanded in a lazy graph,
+is marked as truncated, so that it is not mistaken for the end of the game.
+
+Example:
+
+	python graph_export.py 24000 --format graphml --depth 6 --annotate --output game.graphml
+'''
+import argparse
+import json
+import sys
+from collections import deque
+
+import with_graphs
+
+FORMATS = ("dot", "graphml", "ndjson")
+
+def _walk(graph, root=None, max_depth=None):
+	# Yield (state, children, truncated) once per node, children being only those that are
+	# written too and truncated being True when some children of the state are left out
+	if root is None:
+		if max_depth is not None:
+			raise ValueError("A depth limit needs a root state.")
+		for state in list(graph):
+			# Lazy graphs can point to states that were never expanded, they are left out
+			children = graph.get_children(state)
+			written = [(child, divisor) for child, divisor in children if child in graph]
+			yield state, written, len(written) < len(children)
+		return
+
+	seen = {root}
+	queue = deque([(root, 0)])
+	while queue:
+		state, depth = queue.popleft()
+		if max_depth is not None and depth >= max_depth:
+			yield state, [], not with_graphs.is_terminal(state)
+			continue
+		children = graph.get_children(state)
+		for child, _ in children:
+			if child not in seen:
+				seen.add(child)
+				queue.append((child, depth + 1))
+		yield state, children, False
+
+def _annotation(graph, state):
+	# The minimax value and best move of a node, or (None, None) if it has not been solved
+	try:
+		return graph.get_value(state), graph.get_best_move(state)
+	except ValueError:
+		return None, None
+
+def write_dot(graph, file, root=None, max_depth=None, annotate=False):
+	'''Write a graph in the DOT format of Graphviz.
+
+	Args:
+		graph (Graph): The graph to write. A Graph, LazyGraph or CSRGraph.
+		file (file): The text file object to write to.
+		root (State): Only write the nodes reachable from this state. By default, every node.
+		max_depth (int): Only write the nodes at most this many moves below the root.
+		annotate (bool): True to add the minimax value and best move of the solved nodes.
+
+	Returns:
+		int: The number of nodes written.
+	'''
+	count = 0
+	file.write("digraph G {\n")
+	for state, children, truncated in _walk(graph, root, max_depth):
+		node_id = with_graphs.state_id(state)
+		label = f"actual_number: {state.actual_number}\\npoints_player1: {state.points_player1}\\npoints_player2: {state.points_player2}\\nbank: {state.bank}\\nactual_player: {state.actual_player}"
+		if annotate:
+			value, best_move = _annotation(graph, state)
+			if value is not None:
+				label += f"\\nvalue: {value}\\nbest_move: {best_move}"
+		if truncated:
+			label += "\\ntruncated"
+			file.write(f'  "{node_id}" [label="{label}", style=dashed, truncated=true];\n')
+		else:
+			file.write(f'  "{node_id}" [label="{label}"];\n')
+		for child, divisor in children:
+			file.write(f'  "{node_id}" -> "{with_graphs.state_id(child)}" [label="{divisor}"];\n')
+		count += 1
+	file.write("}\n")
+	return count
+
+def write_graphml(graph, file, root=None, max_depth=None, annotate=False):
+	'''Write a graph in the GraphML format.
+
+	The state fields are node attributes and the divisor is an edge attribute. With annotate,
+	the value and best_move node attributes are added to the solved nodes. The truncated
+	boolean node attribute is true on the nodes whose children are left out.
+
+	Args:
+		graph (Graph): The graph to write. A Graph, LazyGraph or CSRGraph.
+		file (file): The text file object to write to.
+		root (State): Only write the nodes reachable from this state. By default, every node.
+		max_depth (int): Only write the nodes at most this many moves below the root.
+		annotate (bool): True to add the minimax value and best move of the solved nodes.
+
+	Returns:
+		int: The number of nodes written.
+	'''
+	fields = list(with_graphs.State._fields)
+	if annotate:
+		fields += ["value", "best_move"]
+	file.write('<?xml version="1.0" encoding="UTF-8"?>\n')
+	file.write('<graphml xmlns="http://graphml.graphdrawing.org/xmlns">\n')
+	for field in fields:
+		file.write(f'  <key id="{field}" for="node" attr.name="{field}" attr.type="long"/>\n')
+	file.write('  <key id="truncated" for="node" attr.name="truncated" attr.type="boolean"><default>false</default></key>\n')
+	file.write('  <key id="divisor" for="edge" attr.name="divisor" attr.type="int"/>\n')
+	file.write('  <graph id="G" edgedefault="directed">\n')
+	count = 0
+	for state, children, truncated in _walk(graph, root, max_depth):
+		node_id = with_graphs.state_id(state)
+		data = list(zip(with_graphs.State._fields, state))
+		if annotate:
+			value, best_move = _annotation(graph, state)
+			if value is not None:
+				data.append(("value", value))
+			if best_move is not None:
+				data.append(("best_move", best_move))
+		if truncated:
+			data.append(("truncated", "true"))
+		file.write(f'    <node id="{node_id}">')
+		file.write("".join(f'<data key="{key}">{value}</data>' for key, value in data))
+		file.write("</node>\n")
+		for child, divisor in children:
+			file.write(f'    <edge source="{node_id}" target="{with_graphs.state_id(child)}"><data key="divisor">{divisor}</data></edge>\n')
+		count += 1
+	file.write("  </graph>\n</graphml>\n")
+	return count
+
+def write_ndjson(graph, file, root=None, max_depth=None, annotate=False):
+	'''Write a graph as newline-delimited JSON, one object per node.
+
+	Each object has the id and fields of the state and a "children" list of {"id", "divisor"}
+	objects. With annotate, the solved nodes also have "value" and "best_move". "truncated" is
+	true when the children of the node are left out, so an empty list is not the end of the game.
+
+	Args:
+		graph (Graph): The graph to write. A Graph, LazyGraph or CSRGraph.
+		file (file): The text file object to write to.
+		root (State): Only write the nodes reachable from this state. By default, every node.
+		max_depth (int): Only write the nodes at most this many moves below the root.
+		annotate (bool): True to add the minimax value and best move of the solved nodes.
+
+	Returns:
+		int: The number of nodes written.
+	'''
+	count = 0
+	for state, children, truncated in _walk(graph, root, max_depth):
+		record = {"id": with_graphs.state_id(state)}
+		record.update(state._asdict())
+		if annotate:
+			value, best_move = _annotation(graph, state)
+			if value is not None:
+				record["value"] = value
+				record["best_move"] = best_move
+		record["children"] = [{"id": with_graphs.state_id(child), "divisor": divisor} for child, divisor in children]
+		record["truncated"] = truncated
+		file.write(json.dumps(record))
+		file.write("\n")
+		count += 1
+	return count
+
+WRITERS = {
+	"dot": write_dot,
+	"graphml": write_graphml,
+	"ndjson": write_ndjson,
+}
+
+def export_graph(graph, path, format="dot", root=None, max_depth=None, annotate=False):
+	'''Write a graph to a file.
+
+	Args:
+		graph (Graph): The graph to write.
+		path (str): The path of the file.
+		format (str): "dot", "graphml" or "ndjson".
+		root (State): Only write the nodes reachable from this state. By default, every node.
+		max_depth (int): Only write the nodes at most this many moves below the root.
+		annotate (bool): True to add the minimax value and best move of the solved nodes.
+
+	Returns:
+		int: The number of nodes written.
+	'''
+	if format not in WRITERS:
+		raise ValueError(f"Unknown format: {format}")
+	with open(path, "w", encoding="utf-8") as f:
+		return WRITERS[format](graph, f, root, max_depth, annotate)
+
+def main():
+	parser = argparse.ArgumentParser(description="Export the graph of a game to DOT, GraphML or newline-delimited JSON.")
+	parser.add_argument("number", type=int, help="starting number of the game")
+	parser.add_argument("--player", type=int, choices=[1, 2], default=1, help="player who moves first")
+	parser.add_argument("--format", choices=FORMATS, default="dot", help="output format")
+	parser.add_argument("--depth", type=int, default=None, help="only export the states at most this many moves from the start")
+	parser.add_argument("--annotate", action="store_true", help="add the minimax value and best move of each state")
+	parser.add_argument("--output", default=None, help="output file, the standard output by default")
+	args = parser.parse_args()
+
+	state = with_graphs.State(args.number, 0, 0, 0, args.player)
+	if args.depth is None or args.annotate:
+		graph = with_graphs.build_graph(state)[0]
+		if args.annotate:
+			with_graphs.solve_graph(graph)
+	else:
+		# Only the exported states are expanded
+		graph = with_graphs.LazyGraph()
+	if args.output is None:
+		WRITERS[args.format](graph, sys.stdout, state, args.depth, args.annotate)
+	else:
+		count = export_graph(graph, args.output, args.format, state, args.depth, args.annotate)
+		print(f"Wrote {count} states to {args.output}", file=sys.stderr)
+
+if __name__ == "__main__":
+	main()
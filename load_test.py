@@ -0,0 +1,152 @@
+'''Load test of the game server: concurrent sessions playing random moves.
+
+Each session opens its own keep-alive connection and plays whole games against the
+server, choosing a random possible move every turn. The latency of every move, from the
+request to the answer with the computer's reply, is recorded and the percentiles are
+reported.
+
+Example:
+
+	python server.py --port 8080 &
+	python load_test.py --sessions 50 --games 4 --port 8080
+'''
+import argparse
+import asyncio
+import json
+import random
+import time
+
+from server import ALGORITHMS
+
+class Connection:
+	"""
+	Keep-alive HTTP/1.1 connection to the server, sending one JSON request at a time.
+	"""
+	def __init__(self, reader, writer):
+		self.reader = reader
+		self.writer = writer
+
+	@classmethod
+	async def open(cls, host, port):
+		reader, writer = await asyncio.open_connection(host, port)
+		return cls(reader, writer)
+
+	async def request(self, method, path, body=None):
+		'''Send a request and read its answer.
+
+		Args:
+			method (str): The HTTP method.
+			path (str): The path of the request.
+			body (dict): The JSON body, if any.
+
+		Returns:
+			tuple: (status, decoded JSON answer or None).
+		'''
+		payload = b"" if body is None else json.dumps(body).encode()
+		head = f"{method} {path} HTTP/1.1\r\nHost: localhost\r\nContent-Type: application/json\r\nContent-Length: {len(payload)}\r\n\r\n"
+		self.writer.write(head.encode("latin-1") + payload)
+		await self.writer.drain()
+
+		status = int((await self.reader.readline()).split()[1])
+		length = 0
+		while True:
+			line = await self.reader.readline()
+			if line in (b"\r\n", b"\n", b""):
+				break
+			name, _, value = line.decode("latin-1").partition(":")
+			if name.strip().lower() == "content-length":
+				length = int(value)
+		data = await self.reader.readexactly(length) if length else b""
+		return status, json.loads(data) if data else None
+
+	async def close(self):
+		self.writer.close()
+		await self.writer.wait_closed()
+
+def percentile(values, fraction):
+	'''Get a percentile of a list of values, by the nearest-rank method.
+
+	Args:
+		values (list): The values, sorted in increasing order.
+		fraction (float): The percentile, between 0 and 1.
+
+	Returns:
+		float: The smallest value with at least this fraction of the values at or below it.
+	'''
+	if not values:
+		return 0.0
+	rank = max(1, -(-len(values) * fraction // 1))
+	return values[int(rank) - 1]
+
+async def run_session(host, port, games, algorithm, rng, latencies):
+	# Play whole games on one connection, appending the latency of every move
+	connection = await Connection.open(host, port)
+	try:
+		for game_index in range(games):
+			first_player = 1 if game_index % 2 == 0 else 2
+			status, game = await connection.request("POST", "/games", {"first_player": first_player, "algorithm": algorithm})
+			if status != 201:
+				raise RuntimeError(f"Could not start a game: {game}")
+			while not game["over"]:
+				divisor = rng.choice(game["possible_moves"])
+				start = time.perf_counter()
+				status, game = await connection.request("POST", f"/games/{game['id']}/move", {"divisor": divisor})
+				latencies.append(time.perf_counter() - start)
+				if status != 200:
+					raise RuntimeError(f"Move refused: {game}")
+			await connection.request("DELETE", f"/games/{game['id']}")
+	finally:
+		await connection.close()
+
+async def load_test(host="127.0.0.1", port=8080, sessions=10, games=1, algorithm="minimax", seed=None):
+	'''Run concurrent sessions against a running server.
+
+	Args:
+		host (str): The address of the server.
+		port (int): The port of the server.
+		sessions (int): The number of concurrent sessions.
+		games (int): The number of games each session plays.
+		algorithm (str): The algorithm of the computer.
+		seed (int): The seed of the moves of the sessions.
+
+	Returns:
+		dict: The number of moves, the moves per second and the latency percentiles in milliseconds.
+	'''
+	latencies = []
+	seeds = random.Random(seed)
+	start = time.perf_counter()
+	await asyncio.gather(*(run_session(host, port, games, algorithm, random.Random(seeds.random()), latencies) for _ in range(sessions)))
+	seconds = time.perf_counter() - start
+
+	latencies.sort()
+	return {
+		"sessions": sessions,
+		"moves": len(latencies),
+		"seconds": seconds,
+		"moves_per_second": len(latencies) / seconds if seconds else 0.0,
+		"p50_ms": percentile(latencies, 0.5) * 1000,
+		"p90_ms": percentile(latencies, 0.9) * 1000,
+		"p99_ms": percentile(latencies, 0.99) * 1000,
+		"max_ms": latencies[-1] * 1000 if latencies else 0.0,
+	}
+
+def main():
+	parser = argparse.ArgumentParser(description="Play concurrent random games against the game server and report the move latencies.")
+	parser.add_argument("--host", default="127.0.0.1", help="address of the server")
+	parser.add_argument("--port", type=int, default=8080, help="port of the server")
+	parser.add_argument("--sessions", type=int, default=10, help="number of concurrent sessions")
+	parser.add_argument("--games", type=int, default=1, help="games played by each session")
+	parser.add_argument("--algorithm", choices=ALGORITHMS, default="minimax", help="algorithm of the computer")
+	parser.add_argument("--seed", type=int, default=None, help="seed of the moves")
+	parser.add_argument("--json", action="store_true", help="print the report as JSON")
+	args = parser.parse_args()
+
+	report = asyncio.run(load_test(args.host, args.port, args.sessions, args.games, args.algorithm, args.seed))
+	if args.json:
+		print(json.dumps(report))
+	else:
+		print(f"{report['sessions']} sessions, {report['moves']} moves in {report['seconds']:.2f} s ({report['moves_per_second']:.1f} moves/s)")
+		print(f"latency p50 {report['p50_ms']:.2f} ms  p90 {report['p90_ms']:.2f} ms  p99 {report['p99_ms']:.2f} ms  max {report['max_ms']:.2f} ms")
+
+if __name__ == "__main__":
+	main()
@@ -0,0 +1,217 @@
+'''Parallel minimax and alpha-beta searches that split the root across worker processes.
+
+The moves of the first split_depth plies are enumerated in the main process. Each line of
+play is then searched by a worker of a ProcessPoolExecutor, which rebuilds its state with
+apply_action and expands it in its own LazyGraph, so no Graph is ever pickled.
+
+Alpha-beta keeps most of its pruning with a "young brothers wait" scheme: the first root
+move is searched alone to get a bound, then the other moves are searched in parallel
+against that bound. The bound lives in shared memory and is tightened every time a root
+move is fully searched, so lines that start later are searched with a narrower window.
+
+A search can be cancelled with a threading.Event: the lines not started are dropped and
+the running ones are stopped through an event shared with the workers.
+'''
+import multiprocessing
+from concurrent.futures import FIRST_COMPLETED, ProcessPoolExecutor, wait
+
+import with_graphs
+
+CANCEL_POLL_INTERVAL = 0.05  # seconds between checks of the cancel event while the workers search
+
+# Set in each worker process by _init_worker
+_worker_bound = None
+_worker_cancel = None
+_worker_tables = None
+_worker_budget = (None, None)
+
+def _init_worker(bound, cancel, budget=(None, None)):
+	global _worker_bound, _worker_cancel, _worker_tables, _worker_budget
+	_worker_bound = bound
+	_worker_cancel = cancel
+	# (max_nodes, max_bytes) of the LazyGraph of each line
+	_worker_budget = budget
+	# Kept for the life of the worker, so they are reused by every line the worker searches.
+	# Scores depend on the evaluation of the leaves, so there is one table per evaluation
+	_worker_tables = {}
+
+def _search_line(state, path, depth, maximizing_root, algorithm, evaluate=None):
+	# Runs in a worker: search the state reached by playing path from the root
+	for divisor in path:
+		state = with_graphs.apply_action(state, divisor)
+	maximizing_player = maximizing_root if len(path) % 2 == 0 else not maximizing_root
+	graph = with_graphs.LazyGraph(*_worker_budget)
+	table = _worker_tables.get(evaluate)
+	if table is None:
+		table = _worker_tables[evaluate] = with_graphs.TranspositionTable()
+	if algorithm == "minimax":
+		result = with_graphs.minimax_search(graph, state, depth, maximizing_player, table=table, cancel=_worker_cancel, evaluate=evaluate)
+		return result.score, [divisor for _, divisor in result.pv], False
+
+	alpha = float('-inf')
+	beta = float('inf')
+	bound = _worker_bound.value
+	if maximizing_root:
+		alpha = bound
+	else:
+		beta = bound
+	result = with_graphs.alpha_beta_search(graph, state, depth, maximizing_player, alpha, beta, table=table, cancel=_worker_cancel, evaluate=evaluate)
+	# A score that does not beat the root bound is only a bound: this line cannot change the root move
+	failed_low = result.score <= alpha if maximizing_root else result.score >= beta
+	return result.score, [divisor for _, divisor in result.pv], failed_low
+
+def _lines(state, path, depth, split_depth):
+	# Every line of play that is searched by one worker
+	if len(path) == split_depth or depth == len(path) or with_graphs.is_terminal(state):
+		return [path]
+	lines = []
+	for divisor in with_graphs.possible_actions(state):
+		lines.extend(_lines(with_graphs.apply_action(state, divisor), path + (divisor,), depth, split_depth))
+	return lines
+
+def _combine(state, path, maximizing_player, maximizing_root, results):
+	# Minimax over the split plies, from the results of the workers
+	if path in results:
+		return results[path]
+	best = None
+	for divisor in with_graphs.possible_actions(state):
+		score, line, failed_low = _combine(with_graphs.apply_action(state, divisor), path + (divisor,), not maximizing_player, maximizing_root, results)
+		if failed_low:
+			if maximizing_player != maximizing_root:
+				# The opponent can already refute this move, so it cannot change the root move
+				return score, [divisor] + line, True
+			if best is None:
+				best = (score, [divisor] + line, True)
+			continue
+		if best is None or best[2] or (score > best[0] if maximizing_player else score < best[0]):
+			best = (score, [divisor] + line, False)
+	return best
+
+class ParallelSearcher:
+	"""
+	Pool of worker processes that runs parallel searches.
+
+	The pool and the transposition tables of the workers are kept between searches, so one
+	searcher should be reused for a whole game. A searcher runs one search at a time.
+	"""
+	def __init__(self, max_workers=None, max_nodes=None, max_bytes=None):
+		"""
+		Args:
+			max_workers (int): The number of worker processes. By default, the number of processors.
+			max_nodes (int): The most nodes the graph of each line may have. By default, no limit.
+			max_bytes (int): The most memory the graph of each line may take, as in LazyGraph. By default, no limit.
+		"""
+		self._bound = multiprocessing.Value('d', 0.0)
+		# Set to stop the lines running in the workers when a search is cancelled
+		self._cancel = multiprocessing.Event()
+		self.executor = ProcessPoolExecutor(max_workers, initializer=_init_worker, initargs=(self._bound, self._cancel, (max_nodes, max_bytes)))
+
+	def search(self, state, depth, maximizing_player, algorithm="alpha_beta", split_depth=1, evaluate=None, cancel=None):
+		"""
+		Search a state with the moves of the first plies split across the workers.
+
+		Args:
+			state (State): The current state of the game.
+			depth (int): The depth of the search tree.
+			maximizing_player (bool): True if the current player is maximizing, False otherwise.
+			algorithm (str): "alpha_beta" or "minimax".
+			split_depth (int): The number of plies whose moves are split across the workers.
+			evaluate (function): Scores the states where the depth runs out, as in alpha_beta_search.
+								 It must be a module-level function, so it can be sent to the workers.
+			cancel (threading.Event): An event that makes the search raise SearchCancelled when it is set.
+
+		Returns:
+			SearchResult: The score, best move and principal variation for the current player.
+
+		Raises:
+			SearchCancelled: If the cancel event is set before the search ends.
+			GraphBudgetExceeded: If the graph of a line outgrows the budget of the searcher.
+		"""
+		if algorithm not in ("alpha_beta", "minimax"):
+			raise ValueError(f"Unknown algorithm: {algorithm}")
+		if depth == 0 or with_graphs.is_terminal(state):
+			score = evaluate(state) if evaluate is not None else with_graphs.evaluate_state(state)
+			return with_graphs.SearchResult(score, None, None, [], depth)
+
+		self._bound.value = float('-inf') if maximizing_player else float('inf')
+		self._cancel.clear()
+		lines = _lines(state, (), depth, max(1, split_depth))
+		eldest = [line for line in lines if line[0] == lines[0][0]]
+		results = {}
+		self._run(state, eldest, depth, maximizing_player, algorithm, results, evaluate, cancel)
+		self._run(state, lines[len(eldest):], depth, maximizing_player, algorithm, results, evaluate, cancel)
+
+		score, divisors, _ = _combine(state, (), maximizing_player, maximizing_player, results)
+		pv = []
+		child = state
+		for divisor in divisors:
+			child = with_graphs.apply_action(child, divisor)
+			pv.append((child, divisor))
+		return with_graphs.SearchResult(score, pv[0][1], pv[0][0], pv, depth)
+
+	def _run(self, state, lines, depth, maximizing_player, algorithm, results, evaluate=None, cancel=None):
+		# Search the lines in parallel, tightening the shared bound as root moves complete
+		pending = {}
+		remaining = {}
+		for line in lines:
+			future = self.executor.submit(_search_line, state, line, depth - len(line), maximizing_player, algorithm, evaluate)
+			pending[future] = line
+			remaining[line[0]] = remaining.get(line[0], 0) + 1
+		while pending:
+			done, _ = wait(pending, timeout=None if cancel is None else CANCEL_POLL_INTERVAL, return_when=FIRST_COMPLETED)
+			if cancel is not None and cancel.is_set():
+				self._stop(pending)
+				raise with_graphs.SearchCancelled()
+			for future in done:
+				line = pending.pop(future)
+				try:
+					results[line] = future.result()
+				except BaseException:
+					self._stop(pending)
+					raise
+				remaining[line[0]] -= 1
+				if remaining[line[0]] == 0 and algorithm == "alpha_beta":
+					root_move = (line[0],)
+					child = with_graphs.apply_action(state, line[0])
+					score, _, failed_low = _combine(child, root_move, not maximizing_player, maximizing_player, results)
+					bound = self._bound.value
+					if not failed_low and (score > bound if maximizing_player else score < bound):
+						self._bound.value = score
+
+	def _stop(self, pending):
+		# Drop the lines not started and wait for the running ones to stop, so they do not
+		# hold the workers when the next search starts
+		self._cancel.set()
+		for future in pending:
+			future.cancel()
+		wait(pending)
+
+	def shutdown(self, wait=True):
+		"""
+		Stop the worker processes.
+
+		Args:
+			wait (bool): True to wait for the running lines to finish, False to return immediately.
+		"""
+		self.executor.shutdown(wait=wait, cancel_futures=True)
+
+def parallel_search(state, depth, maximizing_player, algorithm="alpha_beta", split_depth=1, max_workers=None):
+	"""
+	Run one parallel search with a temporary pool of worker processes.
+
+	Args:
+		state (State): The current state of the game.
+		depth (int): The depth of the search tree.
+		maximizing_player (bool): True if the current player is maximizing, False otherwise.
+		algorithm (str): "alpha_beta" or "minimax".
+		split_depth (int): The number of plies whose moves are split across the workers.
+		max_workers (int): The number of worker processes. By default, the number of processors.
+
+	Returns:
+		SearchResult: The score, best move and principal variation for the current player.
+	"""
+	searcher = ParallelSearcher(max_workers)
+	try:
+		return searcher.search(state, depth, maximizing_player, algorithm, split_depth)
+	finally:
+		searcher.shutdown()
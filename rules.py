@@ -0,0 +1,331 @@
+'''Configurable rules of the game, on numbers stored as prime exponents.
+
+Every number reachable from a starting number n is n divided by a product of divisors, so
+once the prime factors of the divisors are taken out of n, a position is only the vector of
+the exponents of those primes; the rest of n, the cofactor, never changes. For the default
+divisors 2, 3 and 4 a position is the pair (a, b) of the number cofactor * 2**a * 3**b.
+
+The rules only need the parity of the number, its residue modulo the bank modulus and
+whether it is above the terminal cutoff. These are derived from the exponents with tables
+of prime powers, so the full number is never divided, and a game starting at 10**15 or far
+beyond has at most a few thousand positions.
+
+Example:
+
+	python rules.py 1000000000000000 --player 2
+'''
+import argparse
+import hashlib
+from collections import namedtuple
+from functools import lru_cache
+
+import with_graphs
+
+class Position(namedtuple('Position', ['cofactor', 'exponents'])):
+	"""
+	Number of a game, as cofactor * product of primes[i] ** exponents[i] for the primes of the rules.
+	"""
+	__slots__ = ()
+
+class Rules:
+	"""
+	Rules of a game of dividing numbers.
+
+	A move divides the number by one of the divisors that divides it. The player who moves
+	scores odd_points if the new number is odd and even_points if it is even, and the bank
+	gets a point if the new number is divisible by bank_modulus. The game is over when the
+	number is at most terminal_cutoff or no divisor divides it. The default rules are those of
+	with_graphs, read from its DIVISORS, TERMINAL_CUTOFF and BANK_MODULUS.
+	"""
+	def __init__(self, divisors=with_graphs.DIVISORS, terminal_cutoff=with_graphs.TERMINAL_CUTOFF, bank_modulus=with_graphs.BANK_MODULUS, points=(1, -1), cache_size=1 << 20):
+		"""
+		Args:
+			divisors (tuple): The possible divisors, in the order moves are tried. Each must be at least 2.
+			terminal_cutoff (int): The game is over when the number is at most this.
+			bank_modulus (int): The bank gets a point when the new number is divisible by this. None for no bank.
+			points (tuple): (odd_points, even_points), the points of a move to an odd or even number.
+			cache_size (int): The number of solved positions kept by solve. None for no limit.
+		"""
+		if not divisors or any(divisor < 2 for divisor in divisors):
+			raise ValueError("The divisors must be at least 2.")
+		self.divisors = tuple(divisors)
+		self.terminal_cutoff = terminal_cutoff
+		self.bank_modulus = bank_modulus
+		self.odd_points, self.even_points = points
+
+		primes = sorted({prime for divisor in self.divisors for prime in _prime_factors(divisor)})
+		self.primes = tuple(primes)
+		# Exponent vector of each divisor
+		self.moves = tuple(tuple(_multiplicity(divisor, prime) for prime in primes) for divisor in self.divisors)
+		# Powers of each prime, and their residues modulo 2 and the bank modulus, extended on demand
+		self._powers = [[1] for _ in primes]
+		self._residues = {modulus: [[1 % modulus] for _ in primes] for modulus in (2, bank_modulus) if modulus is not None}
+		self._solve_position = lru_cache(maxsize=cache_size)(self._solve_uncached)
+
+	def fingerprint(self):
+		"""
+		Returns a digest of the configuration, to key stored results by rule set.
+		"""
+		config = (self.divisors, self.terminal_cutoff, self.bank_modulus, self.odd_points, self.even_points)
+		return hashlib.sha1(repr(config).encode()).hexdigest()
+
+	def encode(self, number):
+		"""
+		Split a number into its cofactor and the exponents of the primes of the divisors.
+
+		Args:
+			number (int): A positive number.
+
+		Returns:
+			Position: The number as a position.
+		"""
+		if number < 1:
+			raise ValueError("The number must be positive.")
+		exponents = []
+		for prime in self.primes:
+			exponent = 0
+			while number % prime == 0:
+				number //= prime
+				exponent += 1
+			exponents.append(exponent)
+		return Position(number, tuple(exponents))
+
+	def decode(self, position):
+		"""
+		Returns the number of a position.
+		"""
+		number = position.cofactor
+		for index, exponent in enumerate(position.exponents):
+			number *= self._power(index, exponent)
+		return number
+
+	def _power(self, index, exponent):
+		powers = self._powers[index]
+		while len(powers) <= exponent:
+			powers.append(powers[-1] * self.primes[index])
+		return powers[exponent]
+
+	def residue(self, position, modulus):
+		"""
+		Returns the number of a position modulo 2 or the bank modulus, from the tables of residues.
+		"""
+		tables = self._residues[modulus]
+		residue = position.cofactor % modulus
+		for index, exponent in enumerate(position.exponents):
+			table = tables[index]
+			while len(table) <= exponent:
+				table.append(table[-1] * self.primes[index] % modulus)
+			residue = residue * table[exponent] % modulus
+		return residue
+
+	def _above_cutoff(self, position):
+		# Multiply the prime powers only while the product can still be at most the cutoff
+		limit = self.terminal_cutoff // position.cofactor
+		if limit == 0:
+			return True
+		product = 1
+		for index, exponent in enumerate(position.exponents):
+			if exponent:
+				product *= self._power(index, exponent)
+				if product > limit:
+					return True
+		return False
+
+	def possible_actions(self, position):
+		"""
+		Returns the divisors that divide the number of a position, whether or not the game is over.
+		"""
+		exponents = position.exponents
+		return [divisor for divisor, move in zip(self.divisors, self.moves) if all(have >= need for have, need in zip(exponents, move))]
+
+	def is_terminal(self, position):
+		"""
+		Check if the game is over: the number is at most the cutoff or no divisor divides it.
+		"""
+		return not self._above_cutoff(position) or not self.possible_actions(position)
+
+	def apply_action(self, position, divisor):
+		"""
+		Play a divisor.
+
+		Args:
+			position (Position): The position before the move.
+			divisor (int): The divisor played. It must divide the number.
+
+		Returns:
+			tuple: (position, points, bank), the position after the move, the points of the
+				   player who moved and the points added to the bank.
+		"""
+		move = self.moves[self.divisors.index(divisor)]
+		exponents = tuple(have - need for have, need in zip(position.exponents, move))
+		if min(exponents) < 0:
+			raise ValueError(f"{divisor} does not divide the number.")
+		child = Position(position.cofactor, exponents)
+		points = self.odd_points if self.residue(child, 2) else self.even_points
+		bank = 1 if self.bank_modulus is not None and self.residue(child, self.bank_modulus) == 0 else 0
+		return child, points, bank
+
+	def _solve_uncached(self, position):
+		# Best remaining score difference for the player to move, and the divisor that achieves it
+		if self.is_terminal(position):
+			return 0, None
+		best_value = None
+		best_divisor = None
+		for divisor in self.possible_actions(position):
+			child, points, _ = self.apply_action(position, divisor)
+			value = points - self._solve_position(child)[0]
+			if best_value is None or value > best_value:
+				best_value = value
+				best_divisor = divisor
+		return best_value, best_divisor
+
+	def solve(self, number, player=1):
+		"""
+		Solve the rest of a game, like with_graphs.solve_position but for any rules and any size of number.
+
+		The positions below the number are solved from the smallest up, so the recursion
+		never goes deeper than one move, and kept in a memo shared by every game with the
+		same cofactor.
+
+		Args:
+			number (int or Position): The current number.
+			player (int): The player to move, 1 or 2.
+
+		Returns:
+			tuple: (value, divisor), where value is the change of points_player1 - points_player2
+				   from this position to the end of the game with optimal play, and divisor is the
+				   optimal move, or None if the game is over.
+		"""
+		position = number if isinstance(number, Position) else self.encode(number)
+		for below in self.reachable(position)[::-1]:
+			self._solve_position(below)
+		value, divisor = self._solve_position(position)
+		return (value if player == 1 else -value), divisor
+
+	def reachable(self, position):
+		"""
+		Returns every position reachable from a position, itself included, ordered so that
+		each position comes before the positions it leads to.
+		"""
+		seen = {position}
+		stack = [position]
+		while stack:
+			current = stack.pop()
+			if self.is_terminal(current):
+				continue
+			for divisor in self.possible_actions(current):
+				child = self.apply_action(current, divisor)[0]
+				if child not in seen:
+					seen.add(child)
+					stack.append(child)
+		# Every move lowers the sum of the exponents
+		return sorted(seen, key=lambda current: -sum(current.exponents))
+
+	def agrees_with_engine(self, numbers=range(1, 2001)):
+		"""
+		Check that the rules play like possible_actions, apply_action and is_terminal of with_graphs.
+
+		Args:
+			numbers (iterable): The numbers whose moves are compared.
+
+		Returns:
+			bool: True if every number has the same moves, children, points and bank under both.
+		"""
+		for number in numbers:
+			state = with_graphs.State(number, 0, 0, 0, 1)
+			position = self.encode(number)
+			terminal = with_graphs.is_terminal(state)
+			if terminal != self.is_terminal(position):
+				return False
+			if terminal:
+				continue
+			if with_graphs.possible_actions(state) != self.possible_actions(position):
+				return False
+			for divisor in self.possible_actions(position):
+				child = with_graphs.apply_action(state, divisor)
+				child_position, points, bank = self.apply_action(position, divisor)
+				if (child.actual_number, child.points_player1, child.bank) != (self.decode(child_position), points, bank):
+					return False
+		return True
+
+	def cache_info(self):
+		"""
+		Returns the statistics of the memo of solve, as functools.lru_cache reports them.
+		"""
+		return self._solve_position.cache_info()
+
+	def play(self, number, first_player=1):
+		"""
+		Play a game where both players play the optimal move.
+
+		Args:
+			number (int): The starting number.
+			first_player (int): The player who moves first.
+
+		Returns:
+			tuple: (moves, points_player1, points_player2, bank), with moves the list of divisors played.
+		"""
+		position = self.encode(number)
+		self.solve(position)
+		points = {1: 0, 2: 0}
+		bank = 0
+		player = first_player
+		moves = []
+		while not self.is_terminal(position):
+			divisor = self._solve_position(position)[1]
+			position, gained, banked = self.apply_action(position, divisor)
+			points[player] += gained
+			bank += banked
+			moves.append(divisor)
+			player = 3 - player
+		return moves, points[1], points[2], bank
+
+def _prime_factors(number):
+	factors = []
+	prime = 2
+	while prime * prime <= number:
+		if number % prime == 0:
+			factors.append(prime)
+			while number % prime == 0:
+				number //= prime
+		prime += 1
+	if number > 1:
+		factors.append(number)
+	return factors
+
+def _multiplicity(number, prime):
+	exponent = 0
+	while number % prime == 0:
+		number //= prime
+		exponent += 1
+	return exponent
+
+# The rules of with_graphs. The points of a move are not constants of with_graphs, so main
+# checks the rules against it on a range of numbers before playing under them
+DEFAULT_RULES = Rules()
+
+def main():
+	parser = argparse.ArgumentParser(description="Solve a game of any size under configurable rules and print the optimal line.")
+	parser.add_argument("number", type=int, help="starting number")
+	parser.add_argument("--player", type=int, choices=[1, 2], default=1, help="player who moves first")
+	parser.add_argument("--divisors", type=int, nargs="+", default=list(with_graphs.DIVISORS), help="possible divisors")
+	parser.add_argument("--cutoff", type=int, default=with_graphs.TERMINAL_CUTOFF, help="the game is over at or below this number")
+	parser.add_argument("--bank-modulus", type=int, default=with_graphs.BANK_MODULUS, help="the bank gets a point on multiples of this number")
+	args = parser.parse_args()
+
+	if (tuple(args.divisors), args.cutoff, args.bank_modulus) == (DEFAULT_RULES.divisors, DEFAULT_RULES.terminal_cutoff, DEFAULT_RULES.bank_modulus):
+		if not DEFAULT_RULES.agrees_with_engine():
+			parser.error("rules.DEFAULT_RULES no longer matches the rules of with_graphs")
+		rules = DEFAULT_RULES
+	else:
+		rules = Rules(args.divisors, args.cutoff, args.bank_modulus)
+	position = rules.encode(args.number)
+	value, divisor = rules.solve(position, args.player)
+	moves, points_player1, points_player2, bank = rules.play(args.number, args.player)
+	print(f"{args.number} = {position.cofactor} * " + " * ".join(f"{prime}^{exponent}" for prime, exponent in zip(rules.primes, position.exponents)))
+	print(f"{len(rules.reachable(position))} positions, best move {divisor}, final score {value} for player 1")
+	print(f"Optimal line: {' '.join(map(str, moves))}")
+	print(f"Points: player 1 {points_player1}, player 2 {points_player2}, bank {bank}")
+
+if __name__ == "__main__":
+	main()
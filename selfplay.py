@@ -0,0 +1,242 @@
+'''Headless games between two engines, for strength and throughput runs without a display.
+
+Example:
+
+	python selfplay.py alpha-beta random --games 1000 --workers 4 --seed 1
+
+The first engine always plays player 1 and the second engine player 2. The player who
+moves first alternates from game to game.
+'''
+import argparse
+import json
+import random
+import time
+from collections import Counter
+from concurrent.futures import ProcessPoolExecutor
+
+import with_graphs
+
+class Engine:
+	"""
+	Base class of the players of a headless game.
+	"""
+	mode = None  # Search mode of the current game, for the engines that build a graph
+
+	def start(self, state):
+		"""
+		Called once at the start of each game.
+
+		Args:
+			state (State): The starting state of the game.
+		"""
+
+	def choose(self, state):
+		"""
+		Returns the divisor the engine plays.
+
+		Args:
+			state (State): The current state of the game. It is never terminal.
+
+		Returns:
+			int: The divisor to play.
+		"""
+		raise NotImplementedError
+
+class MinimaxEngine(Engine):
+	"""
+	Plays the optimal move, from solve_position, whose memo is shared by every game of the process.
+	"""
+	def choose(self, state):
+		return with_graphs.solve_position(state.actual_number, state.actual_player)[1]
+
+class AlphaBetaEngine(Engine):
+	"""
+	Plays the move found by a full-depth alpha-beta search, with a table and a move ordering kept across games.
+
+	The solved graphs of the last starting states are kept in a GraphPool, so a starting
+	number played again is not built again. When the graph of a game does not fit in the
+	budget, the engine searches FALLBACK_DEPTH moves deep with heuristic_evaluation instead,
+	through bounded_search.
+	"""
+	def __init__(self, max_nodes=with_graphs.MAX_GRAPH_NODES, max_bytes=with_graphs.MAX_GRAPH_BYTES):
+		# One table per search mode, since the depth-limited scores are only estimates
+		self.tables = {mode: with_graphs.TranspositionTable() for mode in (with_graphs.FULL_GRAPH, with_graphs.DEPTH_LIMITED)}
+		self.ordering = with_graphs.MoveOrdering()
+		self.pool = with_graphs.GraphPool(max_nodes=max_nodes, max_bytes=max_bytes)
+
+	def start(self, state):
+		try:
+			self.graph = self.pool.get(state)
+			self.mode = with_graphs.FULL_GRAPH
+		except with_graphs.GraphBudgetExceeded:
+			self.graph = with_graphs.LazyGraph(self.pool.max_nodes, self.pool.max_bytes)
+			self.mode = with_graphs.DEPTH_LIMITED
+
+	def choose(self, state):
+		result, self.mode = with_graphs.bounded_search(self.graph, state, state.actual_player == 1, self.mode, tables=self.tables, ordering=self.ordering)
+		return result.divisor
+
+class IterativeDeepeningEngine(AlphaBetaEngine):
+	"""
+	Plays the move found by an iterative-deepening search within a time limit.
+	"""
+	def __init__(self, time_limit=0.1, max_nodes=with_graphs.MAX_GRAPH_NODES, max_bytes=with_graphs.MAX_GRAPH_BYTES):
+		super().__init__(max_nodes, max_bytes)
+		self.time_limit = time_limit
+
+	def choose(self, state):
+		result, self.mode = with_graphs.bounded_search(self.graph, state, state.actual_player == 1, self.mode, self.time_limit, self.tables, ordering=self.ordering)
+		return result.divisor
+
+class RandomEngine(Engine):
+	"""
+	Plays a random possible move.
+	"""
+	def __init__(self, seed=None):
+		self.random = random.Random(seed)
+
+	def choose(self, state):
+		return self.random.choice(with_graphs.possible_actions(state))
+
+# Engines that can be chosen by name. Add an entry to make another engine available to run_match and the command line.
+ENGINES = {
+	"minimax": MinimaxEngine,
+	"alpha-beta": AlphaBetaEngine,
+	"iterative-deepening": IterativeDeepeningEngine,
+	"random": RandomEngine,
+}
+
+def play_game(number, engine1, engine2, first_player=1):
+	'''Play one game between two engines.
+
+	Args:
+		number (int): The starting number.
+		engine1 (Engine): The engine playing player 1.
+		engine2 (Engine): The engine playing player 2.
+		first_player (int): The player who moves first.
+
+	Returns:
+		State: The final state of the game.
+	'''
+	state = with_graphs.State(number, 0, 0, 0, first_player)
+	engine1.start(state)
+	engine2.start(state)
+	while not with_graphs.is_terminal(state):
+		engine = engine1 if state.actual_player == 1 else engine2
+		state = with_graphs.apply_action(state, engine.choose(state))
+	return state
+
+def starting_numbers(count, seed=None):
+	'''Draw starting numbers the way the game does, with random_begin.
+
+	Args:
+		count (int): The number of starting numbers.
+		seed (int): The seed of the draw. The global random state is restored afterwards.
+
+	Returns:
+		list: The starting numbers.
+	'''
+	saved = random.getstate()
+	random.seed(seed)
+	try:
+		numbers = []
+		while len(numbers) < count:
+			numbers.extend(with_graphs.random_begin())
+	finally:
+		random.setstate(saved)
+	return numbers[:count]
+
+def _play_games(engine1_name, engine2_name, games):
+	# Play a batch of (number, first player) games and count the results for player 1 and the search modes
+	engine1 = ENGINES[engine1_name]()
+	engine2 = ENGINES[engine2_name]()
+	wins = ties = losses = 0
+	modes = (Counter(), Counter())
+	for number, first_player in games:
+		score = with_graphs.evaluate_state(play_game(number, engine1, engine2, first_player))
+		if score > 0:
+			wins += 1
+		elif score == 0:
+			ties += 1
+		else:
+			losses += 1
+		for engine, counter in zip((engine1, engine2), modes):
+			if engine.mode is not None:
+				counter[engine.mode] += 1
+	return wins, ties, losses, modes
+
+def run_match(engine1_name, engine2_name, games, seed=None, workers=1, batch_size=50):
+	'''Play a series of games between two engines.
+
+	Args:
+		engine1_name (str): The name in ENGINES of the engine playing player 1.
+		engine2_name (str): The name in ENGINES of the engine playing player 2.
+		games (int): The number of games.
+		seed (int): The seed of the starting numbers.
+		workers (int): The number of worker processes. With 1, the games are played in this process.
+		batch_size (int): The number of games sent to a worker at once.
+
+	Returns:
+		dict: The number and rate of wins, ties and losses of the first engine, the time taken,
+			  the games per second and, for each engine, the number of games played in each search mode.
+	'''
+	for name in (engine1_name, engine2_name):
+		if name not in ENGINES:
+			raise ValueError(f"Unknown engine: {name}")
+	numbers = starting_numbers(games, seed)
+	schedule = [(number, 1 if index % 2 == 0 else 2) for index, number in enumerate(numbers)]
+
+	start = time.perf_counter()
+	if workers <= 1:
+		counts = [_play_games(engine1_name, engine2_name, schedule)]
+	else:
+		batches = [schedule[i:i + batch_size] for i in range(0, len(schedule), batch_size)]
+		with ProcessPoolExecutor(workers) as executor:
+			counts = list(executor.map(_play_games, [engine1_name] * len(batches), [engine2_name] * len(batches), batches))
+	seconds = time.perf_counter() - start
+
+	wins = sum(count[0] for count in counts)
+	ties = sum(count[1] for count in counts)
+	losses = sum(count[2] for count in counts)
+	modes = (Counter(), Counter())
+	for count in counts:
+		modes[0].update(count[3][0])
+		modes[1].update(count[3][1])
+	return {
+		"engine1": engine1_name,
+		"engine2": engine2_name,
+		"games": games,
+		"wins": wins,
+		"ties": ties,
+		"losses": losses,
+		"win_rate": wins / games if games else 0.0,
+		"tie_rate": ties / games if games else 0.0,
+		"loss_rate": losses / games if games else 0.0,
+		"seconds": seconds,
+		"games_per_second": games / seconds if seconds else 0.0,
+		"modes": {"engine1": dict(modes[0]), "engine2": dict(modes[1])},
+	}
+
+def main():
+	parser = argparse.ArgumentParser(description="Play headless games between two engines and report the results of the first one.")
+	parser.add_argument("engine1", choices=sorted(ENGINES), help="engine playing player 1")
+	parser.add_argument("engine2", choices=sorted(ENGINES), help="engine playing player 2")
+	parser.add_argument("--games", type=int, default=100, help="number of games")
+	parser.add_argument("--seed", type=int, default=None, help="seed of the starting numbers")
+	parser.add_argument("--workers", type=int, default=1, help="number of worker processes")
+	parser.add_argument("--json", action="store_true", help="print the report as JSON")
+	args = parser.parse_args()
+
+	report = run_match(args.engine1, args.engine2, args.games, args.seed, args.workers)
+	if args.json:
+		print(json.dumps(report))
+	else:
+		print(f"{report['engine1']} vs {report['engine2']}: {report['games']} games")
+		print(f"wins {report['win_rate']:.1%}  ties {report['tie_rate']:.1%}  losses {report['loss_rate']:.1%}")
+		print(f"{report['seconds']:.2f} s, {report['games_per_second']:.1f} games/s")
+		for key in ("engine1", "engine2"):
+			if report["modes"][key]:
+				print(f"{report[key]} search modes: " + ", ".join(f"{mode} {count}" for mode, count in sorted(report["modes"][key].items())))
+
+if __name__ == "__main__":
+	main()
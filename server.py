@@ -0,0 +1,348 @@
+'''HTTP/JSON game server hosting many games at once against the computer.
+
+The client plays player 1 and the computer plays player 2, as in the GUI. Searches run on
+a thread pool so the event loop keeps serving other games meanwhile. The Minimax computer
+reads its moves from with_graphs.solve_position, whose memo is shared by every game of the
+server, so a position solved for one game is never solved again for another.
+
+Example:
+
+	python server.py --port 8080
+
+API, all bodies are JSON:
+
+	POST   /games             {"number": 24000, "first_player": 1, "algorithm": "minimax"}
+	GET    /games/<id>
+	POST   /games/<id>/move   {"divisor": 3}
+	DELETE /games/<id>
+
+Every call but DELETE answers with the game: its id, the state, the possible moves, whether
+it is over and the last move of the computer. Errors answer {"error": message}.
+
+Games left idle for longer than the idle timeout are dropped, and new games are refused
+with 503 while the server holds its maximum number of games. Starting numbers are at most
+MAX_NUMBER, and the searches keep their graphs within a budget, falling back to a
+depth-limited search beyond it, so no game can hold a search thread for long.
+'''
+import argparse
+import asyncio
+import json
+import logging
+import random
+import time
+import uuid
+from collections import OrderedDict
+from concurrent.futures import ThreadPoolExecutor
+
+import with_graphs
+
+ALGORITHMS = ("minimax", "alpha-beta", "iterative-deepening")
+MAX_BODY_SIZE = 1 << 16
+MAX_NUMBER = 10 ** 18  # Largest starting number, so solve_position never recurses more than about 60 moves deep
+MAX_GAMES = 10000
+IDLE_TIMEOUT = 600  # seconds without a request after which a game is dropped
+REASONS = {200: "OK", 201: "Created", 204: "No Content", 400: "Bad Request", 404: "Not Found", 405: "Method Not Allowed", 413: "Payload Too Large", 500: "Internal Server Error", 503: "Service Unavailable"}
+
+logger = logging.getLogger(__name__)
+
+class HTTPError(Exception):
+	"""
+	Error answered to the client with a status code.
+	"""
+	def __init__(self, status, message, close=False):
+		"""
+		Args:
+			status (int): The status code of the answer.
+			message (str): The error sent to the client.
+			close (bool): True to close the connection after the answer, when the rest of the request cannot be read.
+		"""
+		super().__init__(message)
+		self.status = status
+		self.close = close
+
+def find_move(state, algorithm, tables=None, time_limit=0.1, mode=with_graphs.FULL_GRAPH, max_nodes=with_graphs.MAX_GRAPH_NODES, max_bytes=with_graphs.MAX_GRAPH_BYTES):
+	'''Find the move of the computer. Runs on the executor.
+
+	The searches expand a LazyGraph within a budget and fall back to DEPTH_LIMITED mode when
+	it is exceeded, as in with_graphs.bounded_search, so no request holds a thread for long.
+
+	Args:
+		state (State): The state the computer plays from.
+		algorithm (str): One of ALGORITHMS.
+		tables (dict): The TranspositionTable of each search mode of the game.
+		time_limit (float): The time limit of iterative deepening, in seconds.
+		mode (str): The search mode of the game.
+		max_nodes (int): The most nodes the graph of a search may have.
+		max_bytes (int): The most memory the graph of a search may take.
+
+	Returns:
+		tuple: (divisor played by the computer, search mode of the game from now on).
+	'''
+	if algorithm == "minimax":
+		return with_graphs.solve_position(state.actual_number, state.actual_player)[1], mode
+	graph = with_graphs.LazyGraph(max_nodes, max_bytes)
+	time_limit = time_limit if algorithm == "iterative-deepening" else None
+	result, mode = with_graphs.bounded_search(graph, state, state.actual_player == 1, mode, time_limit, tables)
+	return result.divisor, mode
+
+class Game:
+	"""
+	One game of the server.
+	"""
+	def __init__(self, state, algorithm):
+		self.id = uuid.uuid4().hex
+		self.state = state
+		self.algorithm = algorithm
+		# Transposition tables are not thread-safe, so each game has its own, one per search mode
+		self.tables = {mode: with_graphs.TranspositionTable(1 << 16) for mode in (with_graphs.FULL_GRAPH, with_graphs.DEPTH_LIMITED)} if algorithm != "minimax" else None
+		self.mode = with_graphs.FULL_GRAPH
+		self.computer_move = None
+		self.last_used = time.monotonic()
+		# Moves of one game are played one at a time
+		self.lock = asyncio.Lock()
+
+	def as_dict(self):
+		state = self.state
+		over = with_graphs.is_terminal(state)
+		return {
+			"id": self.id,
+			"number": state.actual_number,
+			"points_player1": state.points_player1,
+			"points_player2": state.points_player2,
+			"bank": state.bank,
+			"player": state.actual_player,
+			"over": over,
+			"score": with_graphs.evaluate_state(state),
+			"possible_moves": [] if over else with_graphs.possible_actions(state),
+			"computer_move": self.computer_move,
+			"search_mode": self.mode,
+		}
+
+class GameServer:
+	"""
+	Games in progress and the executor their searches run on.
+	"""
+	def __init__(self, max_workers=None, time_limit=0.1, max_games=MAX_GAMES, idle_timeout=IDLE_TIMEOUT, max_nodes=with_graphs.MAX_GRAPH_NODES, max_bytes=with_graphs.MAX_GRAPH_BYTES):
+		"""
+		Args:
+			max_workers (int): The number of search threads. By default, the ThreadPoolExecutor default.
+			time_limit (float): The time limit of the iterative-deepening computer, in seconds.
+			max_games (int): The most games held at once.
+			idle_timeout (float): The seconds without a request after which a game is dropped.
+			max_nodes (int): The most nodes the graph of one search may have.
+			max_bytes (int): The most memory the graph of one search may take.
+		"""
+		# Least recently used first, so the idle games are at the front
+		self.games = OrderedDict()
+		self.executor = ThreadPoolExecutor(max_workers)
+		self.time_limit = time_limit
+		self.max_games = max_games
+		self.idle_timeout = idle_timeout
+		self.max_nodes = max_nodes
+		self.max_bytes = max_bytes
+
+	async def _play_computer(self, game):
+		# The computer plays while it is its turn, on the executor
+		loop = asyncio.get_running_loop()
+		while game.state.actual_player == 2 and not with_graphs.is_terminal(game.state):
+			divisor, game.mode = await loop.run_in_executor(
+				self.executor, find_move, game.state, game.algorithm, game.tables, self.time_limit, game.mode, self.max_nodes, self.max_bytes)
+			game.state = with_graphs.apply_action(game.state, divisor)
+			game.computer_move = divisor
+
+	def _game(self, game_id):
+		self._drop_idle_games()
+		try:
+			game = self.games[game_id]
+		except KeyError:
+			raise HTTPError(404, "Unknown game.") from None
+		game.last_used = time.monotonic()
+		self.games.move_to_end(game_id)
+		return game
+
+	def _drop_idle_games(self):
+		# Games are kept in order of last use, so only the idle ones at the front are visited
+		deadline = time.monotonic() - self.idle_timeout
+		while self.games:
+			game = next(iter(self.games.values()))
+			if game.last_used > deadline:
+				break
+			del self.games[game.id]
+
+	async def start(self, body):
+		number = body.get("number")
+		if number is None:
+			number = random.choice(with_graphs.random_begin())
+		first_player = body.get("first_player", 1)
+		algorithm = body.get("algorithm", "minimax")
+		# bool is a subclass of int, and 2.0 == 2, so the types are checked exactly
+		if type(number) is not int or not 1 <= number <= MAX_NUMBER:
+			raise HTTPError(400, f"number must be an integer between 1 and {MAX_NUMBER}.")
+		if type(first_player) is not int or first_player not in (1, 2):
+			raise HTTPError(400, "first_player must be 1 or 2.")
+		if algorithm not in ALGORITHMS:
+			raise HTTPError(400, f"algorithm must be one of {', '.join(ALGORITHMS)}.")
+		self._drop_idle_games()
+		if len(self.games) >= self.max_games:
+			raise HTTPError(503, "Too many games in progress.")
+		game = Game(with_graphs.State(number, 0, 0, 0, first_player), algorithm)
+		# The game is only registered once the first move of the computer is played, so a
+		# failed search does not leave it behind
+		async with game.lock:
+			await self._play_computer(game)
+		self.games[game.id] = game
+		return 201, game.as_dict()
+
+	async def move(self, game_id, body):
+		game = self._game(game_id)
+		divisor = body.get("divisor")
+		async with game.lock:
+			state = game.state
+			if with_graphs.is_terminal(state):
+				raise HTTPError(400, "The game is over.")
+			if type(divisor) is not int or divisor not in with_graphs.possible_actions(state):
+				raise HTTPError(400, f"divisor must be one of {with_graphs.possible_actions(state)}.")
+			game.state = with_graphs.apply_action(state, divisor)
+			game.computer_move = None
+			try:
+				await self._play_computer(game)
+			except BaseException:
+				# The move of the user is taken back, so the game can go on
+				game.state = state
+				raise
+		return 200, game.as_dict()
+
+	async def handle(self, method, path, body):
+		'''Answer one request.
+
+		Args:
+			method (str): The HTTP method.
+			path (str): The path of the request.
+			body (dict): The decoded JSON body, empty if there is none.
+
+		Returns:
+			tuple: (status, response), with response a JSON-serializable object or None.
+		'''
+		parts = [part for part in path.split("?")[0].split("/") if part]
+		if parts == ["games"]:
+			if method == "POST":
+				return await self.start(body)
+			if method == "GET":
+				self._drop_idle_games()
+				return 200, {"games": len(self.games), "solve_cache": with_graphs.solve_cache_info()._asdict()}
+		elif len(parts) == 2 and parts[0] == "games":
+			if method == "GET":
+				return 200, self._game(parts[1]).as_dict()
+			if method == "DELETE":
+				self._game(parts[1])
+				self.games.pop(parts[1], None)
+				return 204, None
+		elif len(parts) == 3 and parts[0] == "games" and parts[2] == "move":
+			if method == "POST":
+				return await self.move(parts[1], body)
+		else:
+			raise HTTPError(404, "Unknown path.")
+		raise HTTPError(405, "Method not allowed.")
+
+	async def serve_connection(self, reader, writer):
+		'''Serve the requests of one connection, kept alive until the client closes it.'''
+		try:
+			while True:
+				request_line = await reader.readline()
+				if not request_line:
+					break
+				try:
+					method, path, version = request_line.decode("latin-1").split()
+				except ValueError:
+					break
+				headers = {}
+				while True:
+					line = await reader.readline()
+					if line in (b"\r\n", b"\n", b""):
+						break
+					name, _, value = line.decode("latin-1").partition(":")
+					headers[name.strip().lower()] = value.strip()
+				keep_alive = headers.get("connection", "").lower() != "close" and version == "HTTP/1.1"
+
+				try:
+					try:
+						length = int(headers.get("content-length", 0))
+					except ValueError:
+						length = -1
+					if length < 0:
+						raise HTTPError(400, "Content-Length must be a non-negative integer.", close=True)
+					if length > MAX_BODY_SIZE:
+						raise HTTPError(413, "Body too large.", close=True)
+					data = await reader.readexactly(length) if length else b""
+					try:
+						body = json.loads(data) if data else {}
+					except ValueError:
+						raise HTTPError(400, "The body is not valid JSON.") from None
+					if not isinstance(body, dict):
+						raise HTTPError(400, "The body must be a JSON object.")
+					status, response = await self.handle(method, path, body)
+				except HTTPError as error:
+					status, response = error.status, {"error": str(error)}
+					if error.close:
+						keep_alive = False
+				except Exception:
+					logger.exception("Error while answering %s %s", method, path)
+					status, response = 500, {"error": "Internal server error."}
+
+				payload = b"" if response is None else json.dumps(response).encode()
+				head = f"HTTP/1.1 {status} {REASONS[status]}\r\nContent-Type: application/json\r\nContent-Length: {len(payload)}\r\n"
+				if not keep_alive:
+					head += "Connection: close\r\n"
+				writer.write(head.encode("latin-1") + b"\r\n" + payload)
+				await writer.drain()
+				if not keep_alive:
+					break
+		except (ConnectionError, asyncio.IncompleteReadError):
+			pass
+		finally:
+			writer.close()
+
+	def shutdown(self):
+		self.executor.shutdown(wait=False, cancel_futures=True)
+
+async def serve(host="127.0.0.1", port=8080, max_workers=None, time_limit=0.1, max_games=MAX_GAMES, idle_timeout=IDLE_TIMEOUT, max_nodes=with_graphs.MAX_GRAPH_NODES, max_bytes=with_graphs.MAX_GRAPH_BYTES):
+	'''Run the server until it is cancelled.
+
+	Args:
+		host (str): The address to listen on.
+		port (int): The port to listen on.
+		max_workers (int): The number of search threads.
+		time_limit (float): The time limit of the iterative-deepening computer, in seconds.
+		max_games (int): The most games held at once.
+		idle_timeout (float): The seconds without a request after which a game is dropped.
+		max_nodes (int): The most nodes the graph of one search may have.
+		max_bytes (int): The most memory the graph of one search may take.
+	'''
+	game_server = GameServer(max_workers, time_limit, max_games, idle_timeout, max_nodes, max_bytes)
+	server = await asyncio.start_server(game_server.serve_connection, host, port)
+	try:
+		async with server:
+			await server.serve_forever()
+	finally:
+		game_server.shutdown()
+
+def main():
+	parser = argparse.ArgumentParser(description="Serve games against the computer over HTTP/JSON.")
+	parser.add_argument("--host", default="127.0.0.1", help="address to listen on")
+	parser.add_argument("--port", type=int, default=8080, help="port to listen on")
+	parser.add_argument("--workers", type=int, default=None, help="number of search threads")
+	parser.add_argument("--time-limit", type=float, default=0.1, help="time limit of the iterative-deepening computer, in seconds")
+	parser.add_argument("--max-games", type=int, default=MAX_GAMES, help="most games held at once")
+	parser.add_argument("--idle-timeout", type=float, default=IDLE_TIMEOUT, help="seconds without a request after which a game is dropped")
+	parser.add_argument("--max-nodes", type=int, default=with_graphs.MAX_GRAPH_NODES, help="most nodes the graph of one search may have")
+	parser.add_argument("--max-bytes", type=int, default=with_graphs.MAX_GRAPH_BYTES, help="most memory the graph of one search may take")
+	args = parser.parse_args()
+
+	print(f"Serving on http://{args.host}:{args.port}")
+	try:
+		asyncio.run(serve(args.host, args.port, args.workers, args.time_limit, args.max_games, args.idle_timeout, args.max_nodes, args.max_bytes))
+	except KeyboardInterrupt:
+		pass
+
+if __name__ == "__main__":
+	main()
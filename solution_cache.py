@@ -0,0 +1,88 @@
+'''Persistent cache of solved games, keyed by starting number and rules.
+
+Starting numbers are drawn from a small range, so the same games are played again and
+again. The first time a starting number is played, every number reachable from it is
+solved and the solutions are stored in a local sqlite database; later games with the same
+starting number, in this session or the next, read them back instead of solving again.
+
+Each entry is stored with with_graphs.rules_fingerprint(), so solutions computed under
+other rules are never returned and are deleted when the cache is opened.
+'''
+import os
+import sqlite3
+
+import endgame_table
+import with_graphs
+
+DEFAULT_CACHE_PATH = os.path.join(os.path.dirname(os.path.abspath(__file__)), "solutions.sqlite")
+
+class SolutionCache:
+	'''
+	Solutions of whole games in a sqlite database, one row per starting number.
+
+	A row holds the solutions of every number reachable from its starting number, packed
+	with the record format of endgame_table.
+	'''
+	def __init__(self, path=DEFAULT_CACHE_PATH, rules=None):
+		"""
+		Args:
+			path (str): The path of the database. It is created if it does not exist.
+			rules (str): The fingerprint of the rules. By default, with_graphs.rules_fingerprint().
+		"""
+		self.rules = rules if rules is not None else with_graphs.rules_fingerprint()
+		self._connection = sqlite3.connect(path)
+		with self._connection:
+			self._connection.execute("CREATE TABLE IF NOT EXISTS solutions (start INTEGER, rules TEXT, data BLOB, PRIMARY KEY (start, rules))")
+			self._connection.execute("DELETE FROM solutions WHERE rules != ?", (self.rules,))
+
+	def get(self, number):
+		"""
+		Returns the stored solutions of a starting number.
+
+		Args:
+			number (int): The starting number.
+
+		Returns:
+			dict or None: The solutions as returned by endgame_table.solve_numbers, or None if the number is not in the cache.
+		"""
+		row = self._connection.execute("SELECT data FROM solutions WHERE start = ? AND rules = ?", (number, self.rules)).fetchone()
+		if row is None:
+			return None
+		solved = {}
+		for key, value, divisor in endgame_table.RECORD.iter_unpack(row[0]):
+			solved[key] = (value, divisor or None)
+		return solved
+
+	def put(self, number, solved):
+		"""
+		Store the solutions of a starting number, replacing any stored before.
+
+		Args:
+			number (int): The starting number.
+			solved (dict): The solutions as returned by endgame_table.solve_numbers.
+		"""
+		data = b"".join(endgame_table.RECORD.pack(key, value, divisor or 0) for key, (value, divisor) in sorted(solved.items()))
+		with self._connection:
+			self._connection.execute("INSERT OR REPLACE INTO solutions VALUES (?, ?, ?)", (number, self.rules, data))
+
+	def get_or_solve(self, number):
+		"""
+		Returns the solutions of a starting number, solving and storing them if they are not in the cache.
+
+		Args:
+			number (int): The starting number.
+
+		Returns:
+			dict: The solutions as returned by endgame_table.solve_numbers.
+		"""
+		solved = self.get(number)
+		if solved is None:
+			solved = endgame_table.solve_numbers([number])
+			self.put(number, solved)
+		return solved
+
+	def __len__(self):
+		return self._connection.execute("SELECT COUNT(*) FROM solutions WHERE rules = ?", (self.rules,)).fetchone()[0]
+
+	def close(self):
+		self._connection.close()
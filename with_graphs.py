@@ -1,4 +1,20 @@
+import hashlib
 import random
+from array import array
+from bisect import bisect_left
+import time
+from collections import OrderedDict, namedtuple
+from contextlib import contextmanager
+from functools import lru_cache
+
+try:
+	import numpy as np
+except ImportError:  # NumPy is only needed by solve_batch
+	np = None
+
+DIVISORS = (2, 3, 4)
+TERMINAL_CUTOFF = 10  # The game is over when the number is at most this
+BANK_MODULUS = 5  # The bank gets a point when the new number is divisible by this
 
 def random_begin():
 	'''Generate a list of 5 random numbers between 20000 and 30000 that are divisible by 12.
@@ -15,20 +31,44 @@ def random_begin():
 			count += 1
 	return r
 
-class State:
-	def __init__(self, actual_number, points_player1, points_player2, bank, actual_player):
-		self.actual_number = actual_number
-		self.points_player1 = points_player1
-		self.points_player2 = points_player2
-		self.bank = bank
-		self.actual_player = actual_player
-	
+class State(namedtuple('State', ['actual_number', 'points_player1', 'points_player2', 'bank', 'actual_player'])):
+	"""
+	Immutable state of the game.
+
+	States are compared and hashed by value, so two states with the same five fields
+	are the same node of a Graph.
+	"""
+	__slots__ = ()
+
 	def __display__(self):
 		return f"actual_number: {self.actual_number}\npoints_player1: {self.points_player1}\npoints_player2: {self.points_player2}\nbank: {self.bank}\nactual_player: {self.actual_player}"
 
+def state_id(state):
+	'''Get an id of a state that is the same in every run, for exported graphs.
+
+	Args:
+		state (State): The state to get the id of.
+
+	Returns:
+		str: The five fields of the state joined by underscores, for example "24000_0_0_0_1".
+	'''
+	return "_".join(str(field) for field in state)
+
 class Graph:
 	def __init__(self):
 		self.nodes = {}  # Dictionary to store the graph nodes
+		self.values = {}  # Minimax value of each node, filled by solve_graph
+		self.best_moves = {}  # Optimal divisor of each node, filled by solve_graph
+		self.depths = {}  # Depth of the graph below each node, filled by get_depth and solve_graph
+
+	def __len__(self):
+		return len(self.nodes)
+
+	def __contains__(self, state):
+		return state in self.nodes
+
+	def __iter__(self):
+		return iter(self.nodes)
 
 	def add_node(self, state, children=None):
 		"""
@@ -67,11 +107,10 @@ class Graph:
 		Returns:
 			list: List of children of the node in the form of tuples (state, edge weight).
 		"""
-		for node, children in self.nodes.items():
-			if node.actual_number == state.actual_number and node.points_player1 == state.points_player1 and node.points_player2 == state.points_player2 and node.bank == state.bank and node.actual_player == state.actual_player:
-				return children
-		else:
-			raise ValueError("The node does not belong to the graph.")
+		try:
+			return self.nodes[state]
+		except KeyError:
+			raise ValueError("The node does not belong to the graph.") from None
 		
 	def get_from_divisor(self, state, divisor):
 		"""
@@ -84,28 +123,488 @@ class Graph:
 		Returns:
 			State: The child of the node that is reached by the divisor.
 		"""
-		for node, children in self.nodes.items():
-			if node.actual_number == state.actual_number and node.points_player1 == state.points_player1 and node.points_player2 == state.points_player2 and node.bank == state.bank and node.actual_player == state.actual_player:
-				for child, div in children:
-					if div == divisor:
-						return child
-		else:
+		for child, div in self.get_children(state):
+			if div == divisor:
+				return child
+		raise ValueError("The node has no child reached by this divisor.")
+
+	def get_value(self, state):
+		"""
+		Returns the minimax value of a node, as computed by solve_graph.
+
+		Args:
+			state (State): The state of the node to get the value of.
+
+		Returns:
+			int: The final score (points_player1 - points_player2) reached from the node with optimal play.
+		"""
+		try:
+			return self.values[state]
+		except KeyError:
+			raise ValueError("The node has not been solved.") from None
+
+	def get_best_move(self, state):
+		"""
+		Returns the optimal divisor for the player to move at a node, as computed by solve_graph.
+
+		Args:
+			state (State): The state of the node to get the best move of.
+
+		Returns:
+			int or None: The optimal divisor, or None if the node has no children.
+		"""
+		try:
+			return self.best_moves[state]
+		except KeyError:
+			raise ValueError("The node has not been solved.") from None
+
+	def get_depth(self, state):
+		"""
+		Returns the depth of the graph starting from a given node: 1 for a leaf, else 1 plus the
+		largest depth of its children.
+
+		The depths of the node and of everything below it are computed in a single pass the
+		first time, then read from the cache.
+
+		Args:
+			state (State): The state of the node to get the depth of.
+
+		Returns:
+			int: The depth of the graph below the node.
+		"""
+		depths = self.depths
+		depth = depths.get(state)
+		if depth is not None:
+			return depth
+		stack = [state]
+		while stack:
+			current = stack[-1]
+			if current in depths:
+				stack.pop()
+				continue
+			children = self.get_children(current)
+			pending = [child for child, _ in children if child not in depths]
+			if pending:
+				stack.extend(pending)
+			else:
+				depths[current] = 1 + max((depths[child] for child, _ in children), default=0)
+				stack.pop()
+		return depths[state]
+
+	def reroot(self, state):
+		"""
+		Drop every node that can no longer be reached from a state, with its value, best move and depth.
+
+		Called after each move, it keeps the graph to the rest of the game. The remaining
+		nodes keep their children and solved values. If the state is not in the graph,
+		every node is dropped.
+
+		Args:
+			state (State): The new root, usually the current state of the game.
+
+		Returns:
+			int: The number of nodes dropped.
+		"""
+		nodes = self.nodes
+		reachable = set()
+		stack = []
+		if state in nodes:
+			reachable.add(state)
+			stack.append(state)
+		while stack:
+			for child, _ in nodes[stack.pop()]:
+				if child not in reachable and child in nodes:
+					reachable.add(child)
+					stack.append(child)
+		dropped = len(nodes) - len(reachable)
+		if dropped:
+			# New dictionaries, since removing keys never shrinks a dictionary
+			self.nodes = {node: children for node, children in nodes.items() if node in reachable}
+			self.values = {node: value for node, value in self.values.items() if node in reachable}
+			self.best_moves = {node: divisor for node, divisor in self.best_moves.items() if node in reachable}
+			self.depths = {node: depth for node, depth in self.depths.items() if node in reachable}
+		return dropped
+
+	def copy(self):
+		"""
+		Returns a copy of the graph that can be expanded and rerooted without changing this one.
+
+		The lists of children are shared, which is safe since the children of a node never change once it is expanded.
+		"""
+		graph = type(self)()
+		graph.nodes = dict(self.nodes)
+		graph.values = dict(self.values)
+		graph.best_moves = dict(self.best_moves)
+		graph.depths = dict(self.depths)
+		return graph
+
+class GraphPool:
+	"""
+	Solved graphs of the last games started, so a starting state played again is not built again.
+
+	The byte budget covers every graph of the pool together: the least recently used graphs
+	are dropped until the new one fits. The starting states whose graph did not fit are
+	remembered, so they fail at once instead of being built again up to the budget.
+	"""
+	def __init__(self, max_graphs=8, max_nodes=None, max_bytes=None):
+		"""
+		Args:
+			max_graphs (int): The number of graphs kept. The least recently used is dropped first.
+			max_nodes (int): The most nodes a graph may have, as in build_graph. By default, no limit.
+			max_bytes (int): The most memory the graphs of the pool may take together, estimated
+							 as in build_graph. By default, no limit.
+		"""
+		self.max_graphs = max_graphs
+		self.max_nodes = max_nodes
+		self.max_bytes = max_bytes
+		self.approx_bytes = 0  # Estimated memory of the graphs kept
+		self._graphs = OrderedDict()  # Starting state -> (graph, estimated bytes)
+		self._over_budget = {}  # Starting state -> (nodes, approx_bytes) when its build went over budget
+
+	def get(self, state):
+		"""
+		Returns a solved graph of every state reachable from a state, built and kept on the first call.
+
+		Args:
+			state (State): The starting state of the game.
+
+		Returns:
+			Graph: A copy of the kept graph, so the game can reroot it.
+
+		Raises:
+			GraphBudgetExceeded: If the graph does not fit in the budget of the pool. Nothing is kept then,
+								 and later calls with the same state raise it again without building.
+		"""
+		entry = self._graphs.get(state)
+		if entry is not None:
+			self._graphs.move_to_end(state)
+			return entry[0].copy()
+		if state in self._over_budget:
+			raise GraphBudgetExceeded(*self._over_budget[state])
+		try:
+			graph, nodes, edges = build_graph(state, max_nodes=self.max_nodes, max_bytes=self.max_bytes)
+		except GraphBudgetExceeded as exceeded:
+			self._over_budget[state] = (exceeded.nodes, exceeded.approx_bytes)
+			raise
+		graph = solve_graph(graph)
+		approx_bytes = nodes * NODE_BYTES + edges * EDGE_BYTES
+		self._graphs[state] = (graph, approx_bytes)
+		self.approx_bytes += approx_bytes
+		while len(self._graphs) > self.max_graphs or (self.max_bytes is not None and self.approx_bytes > self.max_bytes and len(self._graphs) > 1):
+			self.approx_bytes -= self._graphs.popitem(last=False)[1][1]
+		return graph.copy()
+
+	def is_over_budget(self, state):
+		"""
+		Check if the graph of a starting state is known not to fit in the budget.
+		"""
+		return state in self._over_budget
+
+	def __len__(self):
+		return len(self._graphs)
+
+	def clear(self):
+		self._graphs.clear()
+		self._over_budget.clear()
+		self.approx_bytes = 0
+
+class LazyGraph(Graph):
+	"""
+	Graph whose nodes are expanded on demand.
+
+	The children of a state are generated with possible_actions and apply_action the first
+	time they are asked for, then cached in nodes. Only the states a search actually visits
+	are created, so nothing has to be built before the first move.
+	"""
+	def __init__(self, max_nodes=None, max_bytes=None):
+		"""
+		Args:
+			max_nodes (int): The most nodes the graph may hold. By default, no limit.
+			max_bytes (int): The most memory the graph may take, estimated with NODE_BYTES and
+							 EDGE_BYTES. By default, no limit.
+		"""
+		super().__init__()
+		self.max_nodes = max_nodes
+		self.max_bytes = max_bytes
+		self.edges = 0  # Number of edges of the expanded nodes, for the memory budget
+		# SearchStats whose "build" phase times the expansions, when set. The time is also
+		# part of the "search" phase of the search that asked for the children
+		self.stats = None
+
+	def get_children(self, state):
+		"""
+		Returns the children of a given node, generating them on the first call.
+
+		Args:
+			state (State): The state of the node to get the children of.
+
+		Returns:
+			list: List of children of the node in the form of tuples (state, edge weight).
+
+		Raises:
+			GraphBudgetExceeded: If expanding the node would exceed the budget of the graph.
+		"""
+		children = self.nodes.get(state)
+		if children is None:
+			stats = self.stats
+			if stats is not None:
+				start = time.perf_counter()
+			if state.actual_number <= TERMINAL_CUTOFF:
+				children = []
+			else:
+				children = [(apply_action(state, divisor), divisor) for divisor in possible_actions(state)]
+			if stats is not None:
+				stats.timings["build"] = stats.timings.get("build", 0.0) + time.perf_counter() - start
+			nodes = len(self.nodes) + 1
+			edges = self.edges + len(children)
+			if (self.max_nodes is not None and nodes > self.max_nodes) or (self.max_bytes is not None and nodes * NODE_BYTES + edges * EDGE_BYTES > self.max_bytes):
+				raise GraphBudgetExceeded(len(self.nodes), len(self.nodes) * NODE_BYTES + self.edges * EDGE_BYTES)
+			self.nodes[state] = children
+			self.edges = edges
+		return children
+
+	def get_depth(self, state):
+		"""
+		Returns depth_bound(state), since the exact depth would require expanding every state below it.
+		"""
+		return depth_bound(state)
+
+	def reroot(self, state):
+		"""
+		Drop every node that can no longer be reached from a state, as Graph.reroot, and recount the edges.
+		"""
+		dropped = super().reroot(state)
+		if dropped:
+			self.edges = sum(len(children) for children in self.nodes.values())
+		return dropped
+
+	def clear(self):
+		"""
+		Drop every expanded node, keeping the budget.
+		"""
+		self.nodes = {}
+		self.depths = {}
+		self.edges = 0
+
+	def copy(self):
+		"""
+		Returns a copy of the graph with the same budget, as Graph.copy.
+		"""
+		graph = super().copy()
+		graph.max_nodes = self.max_nodes
+		graph.max_bytes = self.max_bytes
+		graph.edges = self.edges
+		return graph
+
+class CSRGraph:
+	"""
+	Read-only graph stored in flat typed arrays instead of dictionaries of State objects.
+
+	Node i is the state (numbers[i], points_player1[i], points_player2[i], banks[i], players[i]).
+	The nodes are sorted by state, so a state is found by binary search on numbers, and the
+	children of node i are the nodes targets[offsets[i]:offsets[i + 1]], reached by the
+	divisors at the same positions. Children always have a smaller number than their parent,
+	so the nodes are also in reverse topological order and the graph is solved when it is
+	built.
+
+	The graph has the same get_children, get_from_divisor, get_value, get_best_move and
+	get_depth as Graph, so the searches work on it unchanged. Build it with from_graph.
+	Each field uses the smallest array type that holds the values of a game whose number
+	fits in 64 bits, so a node takes 23 bytes and an edge 5 bytes.
+	"""
+	def __init__(self):
+		self.numbers = array('Q')
+		self.points_player1 = array('h')
+		self.points_player2 = array('h')
+		self.banks = array('H')
+		self.players = array('B')
+		self.offsets = array('I', [0])
+		self.targets = array('I')
+		self.divisors = array('B')
+		self.values = array('h')  # Minimax value of each node
+		self.best_moves = array('B')  # Optimal divisor of each node, 0 if it has no children
+		self.depths = array('B')  # Depth of the graph below each node
+
+	@classmethod
+	def from_graph(cls, graph):
+		"""
+		Build a compact copy of a graph and solve it.
+
+		Args:
+			graph (Graph): The graph to copy. Every child must be a node of the graph.
+
+		Returns:
+			CSRGraph: The compact graph.
+		"""
+		self = cls()
+		states = sorted(graph.nodes)
+		ids = {state: node_id for node_id, state in enumerate(states)}
+		for state in states:
+			self.numbers.append(state.actual_number)
+			self.points_player1.append(state.points_player1)
+			self.points_player2.append(state.points_player2)
+			self.banks.append(state.bank)
+			self.players.append(state.actual_player)
+			for child, divisor in graph.nodes[state]:
+				try:
+					self.targets.append(ids[child])
+				except KeyError:
+					raise ValueError("Every child must belong to the graph.") from None
+				self.divisors.append(divisor)
+			self.offsets.append(len(self.targets))
+		del ids
+		self._solve()
+		return self
+
+	def _solve(self):
+		# Same rules as solve_graph, over the node ids in increasing order
+		values = self.values
+		best_moves = self.best_moves
+		depths = self.depths
+		offsets = self.offsets
+		targets = self.targets
+		divisors = self.divisors
+		for node_id in range(len(self.numbers)):
+			best_value = None
+			best_divisor = 0
+			depth = 0
+			maximizing_player = self.players[node_id] == 1
+			for edge in range(offsets[node_id], offsets[node_id + 1]):
+				child = targets[edge]
+				value = values[child]
+				if best_value is None or (value > best_value if maximizing_player else value < best_value):
+					best_value = value
+					best_divisor = divisors[edge]
+				depth = max(depth, depths[child])
+			if best_value is None:
+				best_value = self.points_player1[node_id] - self.points_player2[node_id]
+			values.append(best_value)
+			best_moves.append(best_divisor)
+			depths.append(depth + 1)
+
+	def __len__(self):
+		return len(self.numbers)
+
+	def __contains__(self, state):
+		return self._find(state) is not None
+
+	def __iter__(self):
+		for node_id in range(len(self.numbers)):
+			yield self.state(node_id)
+
+	def _find(self, state):
+		# Binary search on the number, then a scan of the few nodes that share it
+		numbers = self.numbers
+		number = state.actual_number
+		node_id = bisect_left(numbers, number)
+		while node_id < len(numbers) and numbers[node_id] == number:
+			if (self.points_player1[node_id] == state.points_player1 and self.points_player2[node_id] == state.points_player2
+					and self.banks[node_id] == state.bank and self.players[node_id] == state.actual_player):
+				return node_id
+			node_id += 1
+		return None
+
+	def node_id(self, state):
+		"""
+		Returns the integer id of a node.
+
+		Args:
+			state (State): The state of the node.
+
+		Returns:
+			int: The id of the node, its index in the arrays.
+		"""
+		node_id = self._find(state)
+		if node_id is None:
 			raise ValueError("The node does not belong to the graph.")
+		return node_id
+
+	def state(self, node_id):
+		"""
+		Returns the state of a node.
+
+		Args:
+			node_id (int): The id of the node.
+
+		Returns:
+			State: The state stored at this id.
+		"""
+		return State(self.numbers[node_id], self.points_player1[node_id], self.points_player2[node_id], self.banks[node_id], self.players[node_id])
+
+	def get_children(self, state):
+		"""
+		Returns the children of a given node.
+
+		Args:
+			state (State): The state of the node to get the children of.
+
+		Returns:
+			list: List of children of the node in the form of tuples (state, edge weight).
+		"""
+		node_id = self.node_id(state)
+		return [(self.state(self.targets[edge]), self.divisors[edge]) for edge in range(self.offsets[node_id], self.offsets[node_id + 1])]
+
+	def get_from_divisor(self, state, divisor):
+		"""
+		Returns the child of a given node that is reached by a specific divisor.
+
+		Args:
+			state (State): The state of the node to get the child of.
+			divisor (int): The number by which the starting state is divided to reach the child.
+
+		Returns:
+			State: The child of the node that is reached by the divisor.
+		"""
+		node_id = self.node_id(state)
+		for edge in range(self.offsets[node_id], self.offsets[node_id + 1]):
+			if self.divisors[edge] == divisor:
+				return self.state(self.targets[edge])
+		raise ValueError("The node has no child reached by this divisor.")
+
+	def get_value(self, state):
+		"""
+		Returns the final score (points_player1 - points_player2) reached from a node with optimal play.
+		"""
+		return self.values[self.node_id(state)]
+
+	def get_best_move(self, state):
+		"""
+		Returns the optimal divisor for the player to move at a node, or None if the node has no children.
+		"""
+		return self.best_moves[self.node_id(state)] or None
+
+	def get_depth(self, state):
+		"""
+		Returns the depth of the graph starting from a given node: 1 for a leaf, else 1 plus the
+		largest depth of its children.
+		"""
+		return self.depths[self.node_id(state)]
+
+	def memory_size(self):
+		"""
+		Returns the number of bytes used by the arrays of the graph.
+		"""
+		return sum(len(values) * values.itemsize for values in (
+			self.numbers, self.points_player1, self.points_player2, self.banks, self.players,
+			self.offsets, self.targets, self.divisors, self.values, self.best_moves, self.depths))
 
 def display_graph(self):
 	"""
 	Display the graph in DOT format.
+
+	The nodes are named with state_id, so the output is the same in every run. To write a
+	large graph to a file without building the text in memory, use graph_export.write_dot.
 	"""
-	dot_code = "digraph G {\n"    
+	lines = ["digraph G {\n"]
 	# Add nodes to the DOT code
-	for node, children in self.nodes.items():
-		dot_code += f'  {id(node)} [label="actual_number: {node.actual_number}\npoints_player1: {node.points_player1}\npoints_player2: {node.points_player2}\nbank: {node.bank}\nactual_player: {node.actual_player}"];\n'
+	for node in self.nodes:
+		lines.append(f'  "{state_id(node)}" [label="actual_number: {node.actual_number}\\npoints_player1: {node.points_player1}\\npoints_player2: {node.points_player2}\\nbank: {node.bank}\\nactual_player: {node.actual_player}"];\n')
 	# Add edges to the DOT code
 	for start, ends in self.nodes.items():
 		for end, divisor in ends:
-			dot_code += f'  {id(start)} -> {id(end)} [label="{divisor}"];\n'
-	dot_code += "}"
-	return dot_code
+			lines.append(f'  "{state_id(start)}" -> "{state_id(end)}" [label="{divisor}"];\n')
+	lines.append("}")
+	return "".join(lines)
 
 def possible_actions(state):
 	'''Generate a list of all possible actions from a given state.
@@ -117,7 +616,7 @@ def possible_actions(state):
 		list: A list of all possible actions from the given state.
 	'''
 	actions = []
-	for divisor in [2, 3, 4]:
+	for divisor in DIVISORS:
 		if state.actual_number % divisor == 0:
 			actions.append(divisor)
 	return actions
@@ -133,7 +632,7 @@ def apply_action(state, divisor):
 		state: The new state after applying the action.
 	'''
 	new_number = state.actual_number // divisor
-	if new_number % 5 == 0:
+	if new_number % BANK_MODULUS == 0:
 		new_bank = state.bank + 1
 	else:
 		new_bank = state.bank
@@ -153,6 +652,30 @@ def apply_action(state, divisor):
 		new_state = State(new_number, state.points_player1, new_points, new_bank, 1)
 		return new_state
 
+def is_terminal(state):
+	'''Check if the game is over in a given state.
+
+	Args:
+		state (State): The state to check.
+
+	Returns:
+		bool: True if the number is at most TERMINAL_CUTOFF or cannot be divided anymore, False otherwise.
+	'''
+	return state.actual_number <= TERMINAL_CUTOFF or not possible_actions(state)
+
+def depth_bound(state):
+	'''Get an upper bound on the depth of the game from a given state, without building the graph.
+
+	Every move at least halves the number, so a search this deep always reaches the end of the game.
+
+	Args:
+		state (State): The state to get the bound for.
+
+	Returns:
+		int: The number of bits of the number.
+	'''
+	return state.actual_number.bit_length()
+
 def already_in_graph(state, graph):
 	'''Check if a state is already in the graph.
 
@@ -163,41 +686,663 @@ def already_in_graph(state, graph):
 	Returns:
 		State or None: The existing node if the state is in the graph, None otherwise.
 	'''
-	for node in graph.nodes:
-		if node.actual_number == state.actual_number and node.points_player1 == state.points_player1 and node.points_player2 == state.points_player2 and node.bank == state.bank and node.actual_player == state.actual_player:
-			return node
+	if state in graph.nodes:
+		return state
 	return None
 
+# Approximate memory of a Graph built by build_graph on 64-bit CPython, measured with tracemalloc
+NODE_BYTES = 250
+EDGE_BYTES = 110
+
+class GraphBudgetExceeded(Exception):
+	"""
+	Raised by build_graph or LazyGraph when the graph would get more nodes or memory than allowed.
+	"""
+	def __init__(self, nodes, approx_bytes):
+		super().__init__(f"The graph exceeds its budget after {nodes} nodes (about {approx_bytes} bytes).")
+		self.nodes = nodes
+		self.approx_bytes = approx_bytes
+
+	def __reduce__(self):
+		# Raised in the workers of parallel_search, so it must survive pickling
+		return type(self), (self.nodes, self.approx_bytes)
+
+def build_graph(state, graph=None, max_nodes=None, max_bytes=None):
+	'''Build the graph of all states reachable from a given state.
+
+	Every distinct state is expanded exactly once, and an explicit stack is used instead of
+	recursion, so states shared by several lines of play are not expanded again and long
+	games cannot hit the recursion limit. States already in the graph are considered
+	expanded.
+
+	Args:
+		state (State): The state from which to build the graph.
+		graph (Graph): The graph to add the states to. By default, a new graph is created.
+		max_nodes (int): The most nodes the graph may add. By default, no limit.
+		max_bytes (int): The most memory the added nodes and edges may take, estimated with
+						 NODE_BYTES and EDGE_BYTES. By default, no limit.
+
+	Returns:
+		tuple: (graph, number of nodes added, number of edges added).
+
+	Raises:
+		GraphBudgetExceeded: If a limit would be exceeded. The graph is then incomplete and should be dropped.
+	'''
+	if graph is None:
+		graph = Graph()
+	nodes = graph.nodes
+	node_count = 0
+	edge_count = 0
+	stack = []
+	if state not in nodes:
+		graph.add_node(state)
+		node_count += 1
+		stack.append(state)
+	bounded = max_nodes is not None or max_bytes is not None
+	most_children = len(DIVISORS)
+
+	while stack:
+		current = stack.pop()
+		if current.actual_number <= TERMINAL_CUTOFF:
+			continue
+		if bounded:
+			# Checked before the node is expanded, for the most children it can have
+			approx_bytes = (node_count + most_children) * NODE_BYTES + (edge_count + most_children) * EDGE_BYTES
+			if (max_nodes is not None and node_count + most_children > max_nodes) or (max_bytes is not None and approx_bytes > max_bytes):
+				raise GraphBudgetExceeded(node_count, node_count * NODE_BYTES + edge_count * EDGE_BYTES)
+		children = nodes[current]
+		for divisor in possible_actions(current):
+			child = apply_action(current, divisor)
+			if child not in nodes:
+				graph.add_node(child)
+				node_count += 1
+				stack.append(child)
+			children.append((child, divisor))
+			edge_count += 1
+
+	return graph, node_count, edge_count
+
 def generate_graph(state, player, graph):
 	'''
 	Generate a graph of all possible actions from a given state.
+
+	Args:
+		state (State): The state from which to generate the graph.
+		player (int): Unused, the player to move is read from the state. Kept for compatibility.
+		graph (Graph): The graph to add the states to.
+
+	Returns:
+		Graph: The graph containing every state reachable from the given state.
 	'''
-	graph.add_node(state)
-	
-	if state.actual_number <= 10:
-		return graph
+	return build_graph(state, graph)[0]
 
-	divisors = possible_actions(state)
-	
-	for divisor in divisors:
-		new_state = apply_action(state, divisor)
-		if player == 1:
-			new_player = 2
-		else:
-			new_player = 1
-		old_state = already_in_graph(new_state, graph)
-		if old_state is None:
-			graph.add_node(new_state)
-			graph.add_edge(state, new_state, divisor)
-			graph = generate_graph(new_state, new_player, graph)
-		else:
-			graph.add_edge(state, old_state, divisor)
-			graph = generate_graph(old_state, new_player, graph)
-	
+
+def reverse_topological_order(graph):
+	"""
+	Get the nodes of the graph ordered so that every node comes after all of its children.
+
+	Args:
+		graph (Graph): The graph to order.
+
+	Returns:
+		list: The states of the graph in reverse topological order.
+	"""
+	order = []
+	visited = set()
+	for root in list(graph.nodes):
+		if root in visited:
+			continue
+		visited.add(root)
+		stack = [(root, iter(graph.get_children(root)))]
+		while stack:
+			state, children = stack[-1]
+			for child, _ in children:
+				if child not in visited:
+					visited.add(child)
+					stack.append((child, iter(graph.get_children(child))))
+					break
+			else:
+				stack.pop()
+				order.append(state)
+	return order
+
+def solve_graph(graph):
+	"""
+	Solve every node of the graph by retrograde analysis.
+
+	The nodes are processed once, in reverse topological order, so each value is computed
+	from the already known values of the children. Player 1 maximizes and player 2 minimizes
+	the final score given by evaluate_state. The results can then be read in constant time
+	with Graph.get_value, Graph.get_best_move and Graph.get_depth.
+
+	Args:
+		graph (Graph): The graph to solve.
+
+	Returns:
+		Graph: The solved graph.
+	"""
+	values = graph.values
+	best_moves = graph.best_moves
+	depths = graph.depths
+	for state in reverse_topological_order(graph):
+		best_value = None
+		best_divisor = None
+		depth = 0
+		maximizing_player = state.actual_player == 1
+		for child, divisor in graph.get_children(state):
+			value = values[child]
+			if best_value is None or (value > best_value if maximizing_player else value < best_value):
+				best_value = value
+				best_divisor = divisor
+			depth = max(depth, depths[child])
+		if best_value is None:
+			best_value = evaluate_state(state)
+		values[state] = best_value
+		best_moves[state] = best_divisor
+		depths[state] = depth + 1
 	return graph
 
 
-def minimax(graph, state, depth, maximizing_player):
+# Default number of solved positions kept by solve_position
+SOLVE_CACHE_SIZE = 1 << 20
+
+def _solve_number(number):
+	# Best remaining score difference for the player to move, and the divisor that achieves it
+	state = State(number, 0, 0, 0, 1)
+	if is_terminal(state):
+		return 0, None
+	best_value = None
+	best_divisor = None
+	for divisor in possible_actions(state):
+		child = apply_action(state, divisor)
+		value = child.points_player1 - _solved_numbers(child.actual_number)[0]
+		if best_value is None or value > best_value:
+			best_value = value
+			best_divisor = divisor
+	return best_value, best_divisor
+
+_solved_numbers = lru_cache(maxsize=SOLVE_CACHE_SIZE)(_solve_number)
+
+def solve_position(number, player=1):
+	"""
+	Solve the rest of a game from its number and the player to move.
+
+	The points and the bank never change which moves are possible, and both players score
+	by the same rule, so the rest of the game only depends on the number: the player to move
+	gets the same remaining score difference whoever it is, and the player only decides its
+	sign. The results are kept in a memo shared by every game of the process, so positions
+	reached from different starting numbers are solved once. It agrees with solve_graph,
+	ties included.
+
+	Args:
+		number (int): The current number.
+		player (int): The player to move, 1 or 2.
+
+	Returns:
+		tuple: (value, divisor), where value is the change of points_player1 - points_player2
+			   from this position to the end of the game with optimal play, and divisor is the
+			   optimal move, or None if the game is over.
+	"""
+	value, divisor = _solved_numbers(number)
+	if player == 1:
+		return value, divisor
+	return -value, divisor
+
+def set_solve_cache_size(maxsize):
+	"""
+	Replace the memo of solve_position with an empty one of a different size.
+
+	Args:
+		maxsize (int): The number of positions kept, the least recently used are dropped first. None for no limit.
+	"""
+	global _solved_numbers
+	_solved_numbers = lru_cache(maxsize=maxsize)(_solve_number)
+
+def solve_cache_info():
+	"""
+	Returns the hits, misses, maximum size and current size of the memo of solve_position, as functools.lru_cache reports them.
+	"""
+	return _solved_numbers.cache_info()
+
+def clear_solve_cache():
+	"""
+	Empty the memo of solve_position, for example after the rules changed.
+	"""
+	_solved_numbers.cache_clear()
+
+def solve_batch(numbers):
+	"""
+	Solve the games of many starting numbers at once with NumPy.
+
+	The numbers reachable from all the starting numbers are discovered layer by layer, from
+	the starting numbers down, then solved layer by layer in increasing height so that every
+	child is solved before its parents. Each layer is handled with array operations and the
+	same rules as possible_actions and apply_action. The bank does not change the score, so
+	it does not appear in the results.
+
+	Args:
+		numbers (array_like): The starting numbers. Player 1 moves first and both players start with no points.
+
+	Returns:
+		tuple: Three arrays with one entry per starting number: the outcome for player 1
+			   (1 win, 0 tie, -1 loss), the final score difference points_player1 - points_player2
+			   with optimal play, and the first optimal divisor (0 if the game is already over).
+	"""
+	if np is None:
+		raise ImportError("solve_batch requires NumPy.")
+	starts = np.asarray(numbers, dtype=np.int64)
+
+	# Discover the reachable numbers, expanding each number only once
+	layer = np.unique(starts)
+	seen = layer
+	while layer.size:
+		layer = layer[layer > TERMINAL_CUTOFF]
+		layer = np.unique(np.concatenate([layer[layer % divisor == 0] // divisor for divisor in DIVISORS]))
+		layer = np.setdiff1d(layer, seen, assume_unique=True)
+		seen = np.union1d(seen, layer)
+	reachable = seen
+	count = reachable.size
+
+	# One row per divisor: whether the move is legal, where it leads and what the mover scores
+	legal = np.empty((len(DIVISORS), count), dtype=bool)
+	child_index = np.empty((len(DIVISORS), count), dtype=np.intp)
+	gain = np.empty((len(DIVISORS), count), dtype=np.int64)
+	for row, divisor in enumerate(DIVISORS):
+		children = reachable // divisor
+		legal[row] = (reachable > TERMINAL_CUTOFF) & (reachable % divisor == 0)
+		child_index[row] = np.minimum(np.searchsorted(reachable, children), count - 1)
+		gain[row] = np.where(children % 2 == 0, -1, 1)
+	has_move = legal.any(axis=0)
+
+	# Height of each number: 0 when the game is over, else 1 + the largest height of its children
+	height = np.zeros(count, dtype=np.int64)
+	while True:
+		new_height = np.where(has_move, 1 + np.where(legal, height[child_index], -1).max(axis=0), 0)
+		if np.array_equal(new_height, height):
+			break
+		height = new_height
+
+	# Best remaining score difference for the player to move, one height layer at a time
+	value = np.zeros(count, dtype=np.int64)
+	lowest = np.iinfo(np.int64).min
+	for level in range(1, int(height.max(initial=0)) + 1):
+		layer = np.nonzero(height == level)[0]
+		candidates = np.where(legal[:, layer], gain[:, layer] - value[child_index[:, layer]], lowest)
+		value[layer] = candidates.max(axis=0)
+
+	start_index = np.searchsorted(reachable, starts)
+	candidates = np.where(legal[:, start_index], gain[:, start_index] - value[child_index[:, start_index]], lowest)
+	divisors = np.where(has_move[start_index], np.asarray(DIVISORS)[candidates.argmax(axis=0)], 0)
+	differentials = value[start_index]
+	return np.sign(differentials), differentials, divisors
+
+
+def rules_fingerprint():
+	"""
+	Fingerprint of the rules of the game, used to tell when stored results are out of date.
+
+	Returns:
+		str: A digest of DIVISORS, TERMINAL_CUTOFF and BANK_MODULUS and of the code of possible_actions,
+			 apply_action, is_terminal and evaluate_state.
+	"""
+	digest = hashlib.sha1(repr((DIVISORS, TERMINAL_CUTOFF, BANK_MODULUS)).encode())
+	for function in (possible_actions, apply_action, is_terminal, evaluate_state):
+		code = function.__code__
+		digest.update(code.co_code)
+		digest.update(repr(code.co_consts).encode())
+		digest.update(repr(code.co_names).encode())
+	return digest.hexdigest()
+
+# Bound types of a transposition table entry
+EXACT = 0
+LOWER_BOUND = 1
+UPPER_BOUND = 2
+
+class TranspositionTable:
+	"""
+	Bounded table of search results, shared by minimax_search and alpha_beta_search.
+
+	Entries are keyed by state and side to move, and store the score, the depth searched,
+	the bound type and the best divisor. When the table is full, the least recently used
+	entry is evicted. A table can be kept across moves and games as long as the rules do
+	not change.
+	"""
+	def __init__(self, max_entries=1 << 20, rules=None):
+		"""
+		Args:
+			max_entries (int): The maximum number of entries kept in the table.
+			rules (str): The rules fingerprint the entries are valid for. By default, the current rules.
+		"""
+		self.max_entries = max_entries
+		self.rules = rules if rules is not None else rules_fingerprint()
+		self.entries = OrderedDict()
+		self.hits = 0  # Lookups that found an entry
+		self.usable_hits = 0  # Lookups whose entry answered the search without searching the state again
+		self.misses = 0
+		self.evictions = 0
+
+	def __len__(self):
+		return len(self.entries)
+
+	def lookup(self, state, maximizing_player):
+		"""
+		Returns the entry stored for a state, counting a hit or a miss.
+
+		An entry that is found is not always usable: it may come from a shallower search or
+		only bound the score. The searches call record_usable_hit when they use the entry.
+
+		Args:
+			state (State): The state to look up.
+			maximizing_player (bool): True if the player to move is maximizing, False otherwise.
+
+		Returns:
+			tuple or None: (score, depth, bound type, divisor), or None if the state is not in the table.
+		"""
+		key = (state, maximizing_player)
+		entry = self.entries.get(key)
+		if entry is None:
+			self.misses += 1
+			return None
+		self.hits += 1
+		self.entries.move_to_end(key)
+		return entry
+
+	def store(self, state, maximizing_player, score, depth, bound, divisor):
+		"""
+		Store the result of a search, replacing any older entry for the state.
+
+		Args:
+			state (State): The state that was searched.
+			maximizing_player (bool): True if the player to move is maximizing, False otherwise.
+			score (int): The score found by the search.
+			depth (int): The depth of the search.
+			bound (int): EXACT, LOWER_BOUND or UPPER_BOUND.
+			divisor (int or None): The best divisor found, or None if the state is a leaf.
+		"""
+		key = (state, maximizing_player)
+		entries = self.entries
+		entries[key] = (score, depth, bound, divisor)
+		entries.move_to_end(key)
+		if len(entries) > self.max_entries:
+			entries.popitem(last=False)
+			self.evictions += 1
+
+	def record_usable_hit(self):
+		"""
+		Count a lookup whose entry answered the search, so that the state was not searched again.
+		"""
+		self.usable_hits += 1
+
+	def hit_rate(self):
+		"""
+		Returns the fraction of lookups whose entry answered the search.
+
+		Entries that were found but could not be used, because they were too shallow or their
+		bound did not cut, are counted as hits but not here.
+		"""
+		lookups = self.hits + self.misses
+		return self.usable_hits / lookups if lookups else 0.0
+
+	def clear(self):
+		"""
+		Remove every entry and reset the counters.
+		"""
+		self.entries.clear()
+		self.hits = 0
+		self.usable_hits = 0
+		self.misses = 0
+		self.evictions = 0
+
+	def reset_if_rules_changed(self, rules):
+		"""
+		Clear the table if it was filled under different rules.
+
+		Args:
+			rules (str): The current rules fingerprint.
+
+		Returns:
+			bool: True if the table was cleared, False otherwise.
+		"""
+		if rules == self.rules:
+			return False
+		self.clear()
+		self.rules = rules
+		return True
+
+class SearchResult(namedtuple('SearchResult', ['score', 'divisor', 'child', 'pv', 'depth'])):
+	"""
+	Result of a search from a root state.
+
+	score is the evaluation of the leaf reached with the best play found. divisor and child
+	are the best move from the root and the state it leads to, or None if the root is a leaf.
+	pv is the principal variation: the list of (state, divisor) tuples played from the root
+	to the leaf, in the same form as Graph.get_children. When part of the search was answered
+	by a transposition table, the variation is rebuilt from the table and may stop early.
+	depth is the depth that was searched.
+	"""
+	__slots__ = ()
+
+class SearchTimeout(Exception):
+	"""
+	Raised inside a search when its deadline has passed.
+	"""
+
+class SearchCancelled(Exception):
+	"""
+	Raised by a search when its cancel event is set.
+	"""
+
+class SearchStats:
+	"""
+	Statistics collected by a search, when one is passed as its stats argument.
+
+	The counters add up over every search the object is passed to. Without a stats object,
+	the searches collect nothing.
+	"""
+	def __init__(self):
+		self.nodes = 0  # Nodes visited, leaves included
+		self.leaves = 0  # Leaves evaluated with evaluate_state
+		self.beta_cutoffs = 0  # Cutoffs at maximizing nodes
+		self.alpha_cutoffs = 0  # Cutoffs at minimizing nodes
+		self.table_hits = 0  # Nodes answered by the transposition table
+		self.first_move_cutoffs = 0  # Cutoffs caused by the first child searched
+		self.depth = 0  # Depth of the last search
+		self.max_ply = 0  # Deepest ply visited, below the depth when the game ends earlier on every line
+		self.timings = {}  # Seconds spent in each phase
+
+	def effective_branching_factor(self):
+		"""
+		Returns the branching factor of a uniform tree with as many nodes as were visited, as deep as the deepest ply visited.
+
+		The requested depth is not used: where every line of the game ends before it, the tree
+		is shallower and dividing by the depth would understate the branching factor.
+		"""
+		if self.max_ply == 0 or self.nodes == 0:
+			return 0.0
+		return self.nodes ** (1 / self.max_ply)
+
+	def cutoff_rate(self):
+		"""
+		Returns the fraction of the searched inner nodes (neither leaves nor answered by the table) that ended with a cutoff.
+		"""
+		searched = self.nodes - self.leaves - self.table_hits
+		if searched <= 0:
+			return 0.0
+		return (self.beta_cutoffs + self.alpha_cutoffs) / searched
+
+	def first_move_cutoff_rate(self):
+		"""
+		Returns the fraction of the cutoffs caused by the first child searched, a measure of the move ordering.
+		"""
+		cutoffs = self.beta_cutoffs + self.alpha_cutoffs
+		if cutoffs == 0:
+			return 0.0
+		return self.first_move_cutoffs / cutoffs
+
+	@contextmanager
+	def phase(self, name):
+		"""
+		Time a block of code and add the time to the phase with the given name.
+
+		Args:
+			name (str): The name of the phase, for example "build", "search" or "path".
+		"""
+		start = time.perf_counter()
+		try:
+			yield self
+		finally:
+			self.timings[name] = self.timings.get(name, 0.0) + time.perf_counter() - start
+
+	def as_dict(self):
+		"""
+		Returns the statistics as a dictionary.
+		"""
+		return {
+			"nodes": self.nodes,
+			"leaves": self.leaves,
+			"beta_cutoffs": self.beta_cutoffs,
+			"alpha_cutoffs": self.alpha_cutoffs,
+			"table_hits": self.table_hits,
+			"first_move_cutoffs": self.first_move_cutoffs,
+			"cutoff_rate": self.cutoff_rate(),
+			"first_move_cutoff_rate": self.first_move_cutoff_rate(),
+			"depth": self.depth,
+			"max_ply": self.max_ply,
+			"effective_branching_factor": self.effective_branching_factor(),
+			"timings": dict(self.timings),
+		}
+
+class MoveOrdering:
+	"""
+	Order in which alpha_beta_search tries the children of a node.
+
+	The move found best before, by the transposition table or the previous iteration, is
+	tried first. Then come the moves that score a point for the player to move, a static
+	heuristic on the outcome of apply_action that is right most of the time in this game.
+	Among moves that score the same, the killer moves, the last two moves that caused a
+	cutoff at the same depth, come first, then the moves with the highest history score,
+	which grows every time a move from the same number causes a cutoff, then the moves that
+	add to the bank.
+
+	The killers and the history are kept between searches, so one ordering can be reused
+	for a whole game, or across games.
+	"""
+	def __init__(self, killers=True, history=True, static=True):
+		"""
+		Args:
+			killers (bool): True to try the killer moves early.
+			history (bool): True to order by the history table.
+			static (bool): True to order by the points and the bank of the move.
+		"""
+		self.use_killers = killers
+		self.use_history = history
+		self.use_static = static
+		self.killers = {}  # Remaining depth -> the last two divisors that caused a cutoff there
+		self.history = {}  # (number, divisor) -> sum of the squared depths of the cutoffs it caused
+
+	def order(self, state, children, depth, first=None):
+		"""
+		Returns the children of a node in the order they should be searched.
+
+		Args:
+			state (State): The state of the node.
+			children (list): The children of the node, as tuples (state, divisor).
+			depth (int): The remaining depth of the search at the node.
+			first (int): The divisor to try first, usually the best move of the transposition table.
+
+		Returns:
+			list: The children, reordered.
+		"""
+		killers = self.killers.get(depth, ()) if self.use_killers else ()
+		history = self.history if self.use_history else {}
+		number = state.actual_number
+		sign = 1 if state.actual_player == 1 else -1
+		score = evaluate_state(state)
+		use_static = self.use_static
+
+		def key(child):
+			child_state, divisor = child
+			gain = sign * (score - evaluate_state(child_state)) if use_static else 0
+			bank = state.bank - child_state.bank if use_static else 0
+			return (divisor != first, gain, divisor not in killers, -history.get((number, divisor), 0), bank)
+
+		return sorted(children, key=key)
+
+	def record_cutoff(self, state, divisor, depth):
+		"""
+		Remember a move that caused a cutoff.
+
+		Args:
+			state (State): The state of the node where the cutoff happened.
+			divisor (int): The move that caused it.
+			depth (int): The remaining depth of the search at the node.
+		"""
+		if self.use_killers:
+			killers = self.killers.get(depth)
+			if killers is None:
+				self.killers[depth] = [divisor]
+			elif divisor not in killers:
+				self.killers[depth] = [divisor] + killers[:1]
+		if self.use_history:
+			key = (state.actual_number, divisor)
+			self.history[key] = self.history.get(key, 0) + depth * depth
+
+	def clear(self):
+		self.killers.clear()
+		self.history.clear()
+
+class _Search:
+	"""
+	Settings shared by every node of one search.
+	"""
+	__slots__ = ('graph', 'table', 'deadline', 'pv_moves', 'cancel', 'stats', 'evaluate', 'ordering', 'depth')
+
+	def __init__(self, graph, table, deadline=None, pv_moves=None, cancel=None, stats=None, evaluate=None, ordering=None, depth=0):
+		self.graph = graph
+		self.table = table
+		self.stats = stats
+		self.evaluate = evaluate  # evaluation of the states where the depth runs out before the game ends
+		self.ordering = ordering  # MoveOrdering of the children, or None for the order of the graph
+		self.deadline = deadline  # time.perf_counter() value after which the search stops
+		self.cancel = cancel  # threading.Event that stops the search when set
+		self.pv_moves = pv_moves  # divisor to search first at each state of a previous principal variation
+		self.depth = depth  # depth of the root, so that the ply of a node is depth minus its remaining depth
+
+	def check(self):
+		if self.deadline is not None and time.perf_counter() > self.deadline:
+			raise SearchTimeout()
+		if self.cancel is not None and self.cancel.is_set():
+			raise SearchCancelled()
+
+def _search_result(score, line, depth):
+	if not line:
+		return SearchResult(score, None, None, [], depth)
+	child, divisor = line[0]
+	return SearchResult(score, divisor, child, line, depth)
+
+def _table_line(search, state, depth, maximizing_player):
+	# Follow the best divisors stored in the table to rebuild the line below a table hit
+	line = []
+	entries = search.table.entries
+	while depth > 0:
+		entry = entries.get((state, maximizing_player))
+		if entry is None or entry[3] is None:
+			break
+		child = search.graph.get_from_divisor(state, entry[3])
+		line.append((child, entry[3]))
+		state = child
+		depth -= 1
+		maximizing_player = not maximizing_player
+	return line
+
+def _ordered_children(children, divisor):
+	# Search the child reached by divisor first
+	if divisor is None or children[0][1] == divisor:
+		return children
+	first = [child for child in children if child[1] == divisor]
+	return first + [child for child in children if child[1] != divisor]
+
+def minimax_search(graph, state, depth, maximizing_player, table=None, cancel=None, stats=None, evaluate=None):
 	"""
 	Apply the minimax algorithm on a graph representing the game tree.
 
@@ -206,33 +1351,77 @@ def minimax(graph, state, depth, maximizing_player):
 		state (State): The current state of the game.
 		depth (int): The depth of the search tree.
 		maximizing_player (bool): True if the current player is maximizing, False otherwise.
+		table (TranspositionTable): A table to reuse and store results in. By default, no table is used.
+		cancel (threading.Event): An event that makes the search raise SearchCancelled when it is set.
+		stats (SearchStats): An object to collect statistics in. By default, none are collected.
+		evaluate (function): Scores the states where the depth runs out before the end of the
+							 game, for example heuristic_evaluation. By default, evaluate_state.
 
 	Returns:
-		State: The best state for the current player.
+		SearchResult: The score, best move and principal variation for the current player.
 	"""
-	if depth == 0 or graph.get_children(state) == []:
-		return state
-
-	if maximizing_player:
-		max_score = float('-inf')
-		best_state = None
-		for child_state, divisor in graph.get_children(state):
-			mstate = minimax(graph, child_state, depth - 1, False)
-			score = evaluate_state(mstate)
-			if score > max_score:
-				max_score = score
-				best_state = mstate
-		return best_state
+	search = _Search(graph, table, cancel=cancel, stats=stats, evaluate=evaluate, depth=depth)
+	if stats is None:
+		score, line = _minimax(search, state, depth, maximizing_player)
 	else:
-		min_score = float('inf')
-		best_state = None
-		for child_state, divisor in graph.get_children(state):
-			mstate = minimax(graph, child_state, depth - 1, True)
-			score = evaluate_state(mstate)
-			if score < min_score:
-				min_score = score
-				best_state = mstate
-		return best_state
+		stats.depth = depth
+		with stats.phase("search"):
+			score, line = _minimax(search, state, depth, maximizing_player)
+	return _search_result(score, line, depth)
+
+def _minimax(search, state, depth, maximizing_player):
+	stats = search.stats
+	if stats is not None:
+		stats.nodes += 1
+		if search.depth - depth > stats.max_ply:
+			stats.max_ply = search.depth - depth
+	children = search.graph.get_children(state)
+	if depth == 0 or not children:
+		if stats is not None:
+			stats.leaves += 1
+		if children and search.evaluate is not None:
+			return search.evaluate(state), []
+		return evaluate_state(state), []
+
+	if search.cancel is not None:
+		search.check()
+
+	table = search.table
+	if table is not None:
+		entry = table.lookup(state, maximizing_player)
+		if entry is not None and entry[1] >= depth and entry[2] == EXACT:
+			table.record_usable_hit()
+			if stats is not None:
+				stats.table_hits += 1
+			return entry[0], _table_line(search, state, depth, maximizing_player)
+
+	best_score = None
+	best_line = None
+	for child in children:
+		score, line = _minimax(search, child[0], depth - 1, not maximizing_player)
+		if best_line is None or (score > best_score if maximizing_player else score < best_score):
+			best_score = score
+			best_line = [child] + line
+
+	if table is not None:
+		table.store(state, maximizing_player, best_score, depth, EXACT, best_line[0][1])
+	return best_score, best_line
+
+def minimax(graph, state, depth, maximizing_player):
+	"""
+	Apply the minimax algorithm on a graph representing the game tree.
+
+	Args:
+		graph (Graph): The graph representing the game tree.
+		state (State): The current state of the game.
+		depth (int): The depth of the search tree.
+		maximizing_player (bool): True if the current player is maximizing, False otherwise.
+
+	Returns:
+		State: The leaf state reached with the best play for the current player.
+	"""
+	result = minimax_search(graph, state, depth, maximizing_player)
+	return result.pv[-1][0] if result.pv else state
 
 def evaluate_state(state):
 	"""
@@ -246,8 +1435,80 @@ def evaluate_state(state):
 	"""
 	return state.points_player1 - state.points_player2
 
+def heuristic_evaluation(state):
+	"""
+	Estimate the final score of a state whose game is not over, for depth-limited searches.
+
+	The score is evaluate_state plus the best points the player to move can get with their
+	next move: a move to an odd number is worth 1 and a move to an even number -1.
 
-def alpha_beta(graph, state, depth, alpha, beta, maximizing_player):
+	Args:
+		state (State): The state to evaluate.
+
+	Returns:
+		int: The estimated final score (points_player1 - points_player2).
+	"""
+	score = evaluate_state(state)
+	if is_terminal(state):
+		return score
+	gain = max(1 if (state.actual_number // divisor) % 2 else -1 for divisor in possible_actions(state))
+	return score + gain if state.actual_player == 1 else score - gain
+
+# Search modes of bounded_search
+FULL_GRAPH = "full graph"
+DEPTH_LIMITED = "depth-limited"
+# Depth of the searches in DEPTH_LIMITED mode
+FALLBACK_DEPTH = 8
+# Default budget of the graph of a game, for the GUI, the server and headless runs
+MAX_GRAPH_NODES = 200000
+MAX_GRAPH_BYTES = 64 << 20
+
+def bounded_search(graph, state, maximizing_player, mode=FULL_GRAPH, time_limit=None, tables=None, **options):
+	"""
+	Search a state to the end of the game, or only FALLBACK_DEPTH moves deep once the graph outgrows its budget.
+
+	In FULL_GRAPH mode the search goes as deep as graph.get_depth. If a LazyGraph with a
+	budget raises GraphBudgetExceeded, the graph is cleared and the state is searched again
+	in DEPTH_LIMITED mode, at most FALLBACK_DEPTH moves deep with heuristic_evaluation. A
+	DEPTH_LIMITED search starts from an empty LazyGraph, so it fits in any budget larger
+	than the tree of FALLBACK_DEPTH moves.
+
+	Args:
+		graph (Graph): The graph of the game, usually a LazyGraph with a budget.
+		state (State): The state to search.
+		maximizing_player (bool): True if the current player is maximizing, False otherwise.
+		mode (str): FULL_GRAPH, or DEPTH_LIMITED if the game is already known not to fit.
+		time_limit (float): The time limit of an iterative_deepening_search, in seconds. By
+							default, an alpha_beta_search without time limit.
+		tables (dict): The TranspositionTable of each mode. The scores of the two modes are not
+					   comparable, so they never share a table.
+		**options: The cancel, stats and ordering arguments of the search.
+
+	Returns:
+		tuple: (SearchResult, mode), with the mode the search ended in.
+	"""
+	while True:
+		if mode == DEPTH_LIMITED:
+			if isinstance(graph, LazyGraph):
+				graph.clear()
+			depth = min(graph.get_depth(state), FALLBACK_DEPTH)
+			evaluate = heuristic_evaluation
+		else:
+			depth = graph.get_depth(state)
+			evaluate = None
+		table = tables.get(mode) if tables is not None else None
+		try:
+			if time_limit is None:
+				result = alpha_beta_search(graph, state, depth, maximizing_player, table=table, evaluate=evaluate, **options)
+			else:
+				result = iterative_deepening_search(graph, state, time_limit, maximizing_player, max_depth=depth, table=table, evaluate=evaluate, **options)
+			return result, mode
+		except GraphBudgetExceeded:
+			if mode == DEPTH_LIMITED:
+				raise
+			mode = DEPTH_LIMITED
+
+def alpha_beta_search(graph, state, depth, maximizing_player, alpha=float('-inf'), beta=float('inf'), table=None, cancel=None, stats=None, evaluate=None, ordering=None):
 	"""
 	Apply the alpha-beta pruning algorithm on a graph representing the game tree.
 
@@ -255,43 +1516,172 @@ def alpha_beta(graph, state, depth, alpha, beta, maximizing_player):
 		graph (Graph): The graph representing the game tree.
 		state (State): The current state of the game.
 		depth (int): The depth of the search tree.
+		maximizing_player (bool): True if the current player is maximizing, False otherwise.
 		alpha (float): The alpha value for alpha-beta pruning.
 		beta (float): The beta value for alpha-beta pruning.
+		table (TranspositionTable): A table to reuse and store results in. By default, no table is used.
+		cancel (threading.Event): An event that makes the search raise SearchCancelled when it is set.
+		stats (SearchStats): An object to collect statistics in. By default, none are collected.
+		evaluate (function): Scores the states where the depth runs out before the end of the
+							 game, for example heuristic_evaluation. By default, evaluate_state.
+		ordering (MoveOrdering): The order the children are tried in. By default, the order of the graph.
+
+	Returns:
+		SearchResult: The score, best move and principal variation for the current player.
+	"""
+	search = _Search(graph, table, cancel=cancel, stats=stats, evaluate=evaluate, ordering=ordering, depth=depth)
+	if stats is None:
+		score, line = _alpha_beta(search, state, depth, alpha, beta, maximizing_player)
+	else:
+		stats.depth = depth
+		with stats.phase("search"):
+			score, line = _alpha_beta(search, state, depth, alpha, beta, maximizing_player)
+	return _search_result(score, line, depth)
+
+def _alpha_beta(search, state, depth, alpha, beta, maximizing_player):
+	stats = search.stats
+	if stats is not None:
+		stats.nodes += 1
+		if search.depth - depth > stats.max_ply:
+			stats.max_ply = search.depth - depth
+	children = search.graph.get_children(state)
+	if depth == 0 or not children:
+		if stats is not None:
+			stats.leaves += 1
+		if children and search.evaluate is not None:
+			return search.evaluate(state), []
+		return evaluate_state(state), []
+
+	if search.deadline is not None or search.cancel is not None:
+		search.check()
+	first = None
+	if search.pv_moves is not None:
+		first = search.pv_moves.get(state)
+
+	table = search.table
+	if table is not None:
+		entry = table.lookup(state, maximizing_player)
+		if entry is not None:
+			if entry[1] >= depth:
+				score, _, bound, _ = entry
+				if bound == EXACT or (bound == LOWER_BOUND and score >= beta) or (bound == UPPER_BOUND and score <= alpha):
+					table.record_usable_hit()
+					if stats is not None:
+						stats.table_hits += 1
+					return score, _table_line(search, state, depth, maximizing_player)
+			first = entry[3]
+		original_alpha = alpha
+		original_beta = beta
+
+	ordering = search.ordering
+	if ordering is not None:
+		children = ordering.order(state, children, depth, first)
+	elif first is not None:
+		children = _ordered_children(children, first)
+
+	best_score = None
+	best_line = None
+	for child in children:
+		score, line = _alpha_beta(search, child[0], depth - 1, alpha, beta, not maximizing_player)
+		if maximizing_player:
+			if best_line is None or score > best_score:
+				best_score = score
+				best_line = [child] + line
+			alpha = max(alpha, best_score)
+		else:
+			if best_line is None or score < best_score:
+				best_score = score
+				best_line = [child] + line
+			beta = min(beta, best_score)
+		if beta <= alpha:
+			if stats is not None:
+				if maximizing_player:
+					stats.beta_cutoffs += 1
+				else:
+					stats.alpha_cutoffs += 1
+				if child is children[0]:
+					stats.first_move_cutoffs += 1
+			if ordering is not None:
+				ordering.record_cutoff(state, child[1], depth)
+			break
+
+	if table is not None:
+		if best_score <= original_alpha:
+			bound = UPPER_BOUND
+		elif best_score >= original_beta:
+			bound = LOWER_BOUND
+		else:
+			bound = EXACT
+		table.store(state, maximizing_player, best_score, depth, bound, best_line[0][1])
+	return best_score, best_line
+
+def iterative_deepening_search(graph, state, time_limit, maximizing_player, max_depth=None, table=None, cancel=None, stats=None, evaluate=None, ordering=None):
+	"""
+	Run alpha-beta searches of increasing depth until the time limit is reached.
+
+	Each iteration searches the principal variation of the previous one first. The first
+	iteration always completes, so a move is returned even with a very small time limit.
+
+	Args:
+		graph (Graph): The graph representing the game tree.
+		state (State): The current state of the game.
+		time_limit (float): The wall-clock budget of the search, in seconds.
 		maximizing_player (bool): True if the current player is maximizing, False otherwise.
+		max_depth (int): The deepest search to run. By default, depth_bound(state).
+		table (TranspositionTable): A table to reuse and store results in. By default, no table is used.
+		cancel (threading.Event): An event that makes the search raise SearchCancelled when it is set.
+		stats (SearchStats): An object to collect statistics in, over all the iterations. By default, none are collected.
+		evaluate (function): Scores the states where the depth runs out before the end of the
+							 game, for example heuristic_evaluation. By default, evaluate_state.
+		ordering (MoveOrdering): The order the children are tried in, kept across the iterations. By default, the order of the graph.
 
 	Returns:
-		State: The best state for the current player.
+		SearchResult: The result of the deepest search that completed in time.
 	"""
-	if depth == 0 or graph.get_children(state) == []:
-		return state
+	start = time.perf_counter()
+	deadline = start + time_limit
+	if max_depth is None:
+		max_depth = depth_bound(state)
+	search = _Search(graph, table, cancel=cancel, stats=stats, evaluate=evaluate, ordering=ordering, depth=1)
+	score, line = _alpha_beta(search, state, 1, float('-inf'), float('inf'), maximizing_player)
+	result = _search_result(score, line, 1)
 
-	if maximizing_player:
-		max_score = float('-inf')
-		best_state = None
-		for child_state, divisor in graph.get_children(state):
-			
-			mstate = alpha_beta(graph, child_state, depth - 1, alpha, beta, False)
-			score = evaluate_state(mstate)
-			if score > max_score:
-				max_score = score
-				best_state = mstate
-			alpha = max(alpha, max_score)
-			if beta <= alpha:
-				break
-		return best_state
-	else:
-		min_score = float('inf')
-		best_state = None
-		for child_state, divisor in graph.get_children(state):
-			mstate = alpha_beta(graph, child_state, depth - 1, alpha, beta, True)
-			score = evaluate_state(mstate)
-			if score < min_score:
-				min_score = score
-				best_state = mstate
-			beta = min(beta, min_score)
-			if beta <= alpha:
-				break
-		return best_state
+	search.deadline = deadline
+	for depth in range(2, max_depth + 1):
+		search.pv_moves = {}
+		parent = state
+		for child, divisor in result.pv:
+			search.pv_moves[parent] = divisor
+			parent = child
+		search.depth = depth
+		try:
+			score, line = _alpha_beta(search, state, depth, float('-inf'), float('inf'), maximizing_player)
+		except SearchTimeout:
+			break
+		result = _search_result(score, line, depth)
+
+	if stats is not None:
+		stats.depth = result.depth
+		stats.timings["search"] = stats.timings.get("search", 0.0) + time.perf_counter() - start
+	return result
+
+def alpha_beta(graph, state, depth, alpha, beta, maximizing_player):
+	"""
+	Apply the alpha-beta pruning algorithm on a graph representing the game tree.
+
+	Args:
+		graph (Graph): The graph representing the game tree.
+		state (State): The current state of the game.
+		depth (int): The depth of the search tree.
+		alpha (float): The alpha value for alpha-beta pruning.
+		beta (float): The beta value for alpha-beta pruning.
+		maximizing_player (bool): True if the current player is maximizing, False otherwise.
+
+	Returns:
+		State: The leaf state reached with the best play for the current player.
+	"""
+	result = alpha_beta_search(graph, state, depth, maximizing_player, alpha, beta)
+	return result.pv[-1][0] if result.pv else state
 
 def get_path(graph, origin, goal):
 	"""
@@ -327,9 +1717,13 @@ def get_path(graph, origin, goal):
 def get_depth(graph, origin):
 	"""
 	Get the depth of the graph starting from a given node.
+
+	Args:
+		graph (Graph): The graph representing the game tree.
+		origin (State): The node to get the depth of.
+
+	Returns:
+		int: The depth of the graph below the node, cached by the graph.
 	"""
-	depth = 0
-	for c in graph.get_children(origin):
-		depth = max(depth, get_depth(graph, c[0]))
-	return depth + 1
+	return graph.get_depth(origin)
 	